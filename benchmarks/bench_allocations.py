@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+"""Checks that steady-state frames allocate less memory than a fixed budget.
+
+A scene of moving solids is drawn off-screen with each rasterizer while the camera turns back and
+forth, so that every shape is updated and projected again every frame. Once the buffers reused
+from frame to frame have reached their size, the memory allocated by each frame is traced with
+`tracemalloc`: the peak above the memory in use before the frame, and the memory still in use
+once all frames are done. The exit status is 1 if either exceeds the budget of the rasterizer.
+
+Usage:
+    python benchmarks/bench_allocations.py [--size 500] [--frames 30]
+                                           [--rasterizers aaline pixels tiled] [--budget 512]
+"""
+
+import argparse
+import gc
+import itertools
+import os
+import statistics
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# Rendering happens off-screen, no window is needed.
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+# pylint: disable=wrong-import-position
+import pygame
+from pygame import Vector3
+
+from config import SCREEN_WIDTH, SCREEN_HEIGHT
+from display import Display, RASTERIZERS
+from rasterizer import Rasterizer
+from bench_suite import make_world
+
+__author__ = "Jye-Ming Serres"
+
+
+WARMUP_FRAMES = 10
+
+# KiB a frame of 500 solids may allocate at its peak with each rasterizer, about 30% above what
+# they allocate once their buffers are reused.
+BUDGETS = {
+    "aaline": 320,
+    "pixels": 1280,
+    "tiled": 1024,
+    }
+
+
+def trace_frames(size: int, frames: int, rasterizer: Rasterizer) -> tuple[list[int], int]:
+    """Draws steady-state frames of a scene and traces the memory they allocate.
+
+    Args:
+        size: Number of solids.
+        frames: Number of frames traced.
+        rasterizer: Draws the projected edges.
+
+    Returns:
+        The peak memory (bytes) allocated by each frame above the memory in use before it, and the
+        memory still in use after the last frame.
+    """
+    world = make_world(size)
+    display = Display(pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)), rasterizer)
+    angular_displacements = itertools.cycle((Vector3(0.1, 0, 0), Vector3(-0.1, 0, 0)))
+    def draw_frame() -> None:
+        world.update(1/60)
+        world.camera.rotate(next(angular_displacements))
+        display.draw(world, 60)
+
+    for _ in range(WARMUP_FRAMES):
+        draw_frame()
+    gc.collect()
+    tracemalloc.start()
+    start = tracemalloc.get_traced_memory()[0]
+    peaks = []
+    for _ in range(frames):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        draw_frame()
+        peaks.append(tracemalloc.get_traced_memory()[1] - before)
+    gc.collect()
+    retained = tracemalloc.get_traced_memory()[0] - start
+    tracemalloc.stop()
+    return peaks, retained
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", type=int, default=500,
+                        help="number of solids, the budgets of the rasterizers are for 500")
+    parser.add_argument("--frames", type=int, default=30, help="number of frames traced")
+    parser.add_argument("--rasterizers", nargs="+", choices=BUDGETS, default=list(BUDGETS))
+    parser.add_argument("--budget", type=float,
+                        help="KiB a frame may allocate at its peak, and the whole run may retain, "
+                             "instead of the budget of each rasterizer")
+    args = parser.parse_args()
+
+    pygame.init()
+    over_budget = False
+    print(f"{args.size} solids, {args.frames} frames")
+    print(f"{'rasterizer':>28} {'median peak':>12} {'max peak':>9} {'retained':>9} {'budget':>7}")
+    for kind in RASTERIZERS:
+        if kind.name not in args.rasterizers:
+            continue
+        rasterizer = kind()
+        peaks, retained = trace_frames(args.size, args.frames, rasterizer)
+        rasterizer.close()
+        budget = BUDGETS[kind.name] if args.budget is None else args.budget
+        over = max(*peaks, retained) > budget*1024
+        over_budget |= over
+        print(f"{rasterizer.name:>28} {statistics.median(peaks)/1024:>8.1f} KiB "
+              f"{max(peaks)/1024:>5.1f} KiB {retained/1024:>5.1f} KiB {budget:>7.0f}"
+              + (" over budget" if over else ""))
+    if over_budget:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""Measures the cost of finding and resolving collisions between moving solids.
+
+Worlds of moving solids are stepped with and without collisions, for each response. The time of
+a world update is reported along with the number of pairs tested and found overlapping per update.
+`--check` also compares the pairs found with those of a brute force search on the first update.
+
+Usage:
+    python benchmarks/bench_collisions.py [--sizes 1000 10000] [--updates 100]
+                                          [--responses report stop bounce] [--check]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# pylint: disable=wrong-import-position
+import numpy as np
+
+from world import World
+from collisions import Collisions, Response
+from bench_suite import make_world
+
+__author__ = "Jye-Ming Serres"
+
+
+def brute_force_pairs(world: World) -> np.ndarray:
+    """Tests every pair of shapes of a world, one shape against all the others at a time.
+
+    Args:
+        world: The world.
+
+    Returns:
+        Indices of both shapes of each pair whose bounding spheres overlap, the lowest first,
+        sorted. Shape (k, 2).
+    """
+    centers = world.centers
+    radii = np.array([shape.mesh.radius for shape in world.shapes])
+    pairs = []
+    for i in range(len(centers) - 1):
+        distances = np.linalg.norm(centers[i + 1:] - centers[i], axis=1)
+        overlapping = np.flatnonzero(distances < radii[i + 1:] + radii[i]) + i + 1
+        pairs.extend((i, j) for j in overlapping.tolist())
+    return np.array(pairs, dtype=np.intp).reshape(-1, 2)
+
+
+def time_updates(world: World, updates: int) -> tuple[float, float, float]:
+    """Times stepping a world.
+
+    Args:
+        world: The world to step.
+        updates: Number of updates timed.
+
+    Returns:
+        The median time (seconds) of an update, and the average number of pairs tested and found
+        overlapping per update.
+    """
+    times = []
+    candidates = 0
+    overlaps = 0
+    for _ in range(updates):
+        start = time.perf_counter()
+        world.update(1/60)
+        times.append(time.perf_counter() - start)
+        if world.collisions is not None:
+            candidates += world.collisions.candidate_count
+            overlaps += len(world.collisions.pairs)
+    return statistics.median(times), candidates/updates, overlaps/updates
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--updates", type=int, default=100)
+    parser.add_argument("--responses", nargs="+", choices=[response.value for response in Response],
+                        default=[response.value for response in Response])
+    parser.add_argument("--check", action="store_true",
+                        help="compare the pairs found with a brute force search")
+    args = parser.parse_args()
+
+    mismatch = False
+    print(f"{'solids':>7} {'response':>9} {'update (ms)':>12} {'tested':>9} {'overlapping':>12}")
+    for size in args.sizes:
+        world = make_world(size)
+        alone, _, _ = time_updates(world, args.updates)
+        print(f"{size:>7} {'-':>9} {alone*1000:>12.2f} {'-':>9} {'-':>12}")
+        for name in args.responses:
+            world = make_world(size)
+            world.collisions = Collisions(Response(name))
+            if args.check:
+                world.update(0)
+                if not np.array_equal(world.collisions.pairs, brute_force_pairs(world)):
+                    print(f"{size:>7} {name:>9} pairs differ from the brute force search")
+                    mismatch = True
+            update, candidates, overlaps = time_updates(world, args.updates)
+            print(f"{size:>7} {name:>9} {update*1000:>12.2f} {candidates:>9.0f} {overlaps:>12.1f}")
+    if mismatch:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
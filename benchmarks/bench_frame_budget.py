@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+"""Measures frames drawn within a frame budget while the camera turns, for each rasterizer.
+
+The camera turns for a number of frames, then stops and frames are drawn until no shape is left
+with an outdated image. The median and longest frame while turning are reported, along with the
+number of frames it took to catch up. `--check` also compares the last frame with one drawn
+without a budget, which must be identical.
+
+Usage:
+    python benchmarks/bench_frame_budget.py [--sizes 2000 5000] [--budget 10] [--frames 60]
+                                            [--check]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# Rendering happens off-screen, no window is needed.
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+# pylint: disable=wrong-import-position
+import numpy as np
+import pygame
+from pygame import Vector3
+
+from config import Color, SCREEN_WIDTH, SCREEN_HEIGHT
+from display import Display, RASTERIZERS
+from world import World
+from bench_suite import make_world
+
+__author__ = "Jye-Ming Serres"
+
+
+MAX_CATCH_UP_FRAMES = 1000 # frames drawn at most after the camera stopped
+
+
+def draw_frame(display: Display, surface: pygame.Surface, world: World) -> np.ndarray:
+    """Draws a frame of the world.
+
+    Args:
+        display: Draws the frame.
+        surface: The surface the display draws on.
+        world: The world drawn.
+
+    Returns:
+        The pixels of the frame. Shape (width, height, 3).
+    """
+    display.draw(world, 0)
+    return pygame.surfarray.array3d(surface)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2000, 5000])
+    parser.add_argument("--budget", type=float, default=10, help="frame budget (ms)")
+    parser.add_argument("--frames", type=int, default=60, help="frames drawn while turning")
+    parser.add_argument("--check", action="store_true",
+                        help="compare the last frame with one drawn without a budget")
+    args = parser.parse_args()
+
+    pygame.init()
+    colors = tuple(color for color in Color if color != Color.DEEP_SPACE)
+    angular_velocity = Vector3(0.3, 0.1, 0)
+    mismatch = False
+    print(f"{'solids':>7} {'rasterizer':>10} {'median (ms)':>12} {'max (ms)':>9} "
+          f"{'catch-up frames':>16}")
+    for size in args.sizes:
+        for kind in RASTERIZERS:
+            world = make_world(size, colors)
+            surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+            display = Display(surface, kind())
+            display.show_ui = False
+            display.frame_budget = args.budget/1000
+            times = []
+            for _ in range(args.frames):
+                world.camera.rotate(angular_velocity)
+                world.update(1/60)
+                start = time.perf_counter()
+                display.draw(world, 0)
+                times.append(time.perf_counter() - start)
+            catch_up = 0
+            while display.deferred_shapes and catch_up < MAX_CATCH_UP_FRAMES:
+                display.draw(world, 0)
+                catch_up += 1
+            print(f"{size:>7} {kind.name:>10} {statistics.median(times)*1000:>12.2f} "
+                  f"{max(times)*1000:>9.2f} {catch_up:>16}")
+            if args.check:
+                budgeted = draw_frame(display, surface, world)
+                display.frame_budget = None
+                if not np.array_equal(budgeted, draw_frame(display, surface, world)):
+                    print(f"{size:>7} {kind.name:>10} the frame differs from one drawn without a "
+                          "budget")
+                    mismatch = True
+    if mismatch:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Measures how stepping moving solids scales with their number.
+
+Compares the batched kinematics stage of `World.update` with stepping each shape on its own through
+`Shape.update`.
+
+Usage:
+    python benchmarks/bench_kinematics.py [--counts 1000 10000 100000] [--frames 50]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# pylint: disable=wrong-import-position
+from pygame import Vector3
+
+from config import Color
+from camera import Camera
+from shape_factory import ShapeFactory
+from world import World
+
+__author__ = "Jye-Ming Serres"
+
+
+SHAPE_NAMES = ("tetrahedron", "cube", "octahedron", "dodecahedron", "icosahedron")
+
+
+def make_world(count: int) -> World:
+    """Creates a world of moving solids scattered in a cube.
+
+    Args:
+        count: Number of solids.
+
+    Returns:
+        The world.
+    """
+    rng = random.Random(0)
+    shape_factory = ShapeFactory()
+    world = World(Camera(Vector3(0, 0, 0), 360), [])
+    for i in range(count):
+        pos = Vector3(rng.uniform(-1e4, 1e4), rng.uniform(-1e4, 1e4), rng.uniform(-1e4, 1e4))
+        shape = shape_factory.make_shape(SHAPE_NAMES[i % len(SHAPE_NAMES)], pos, 100, Color.WHITE)
+        shape.rectilinear_velocity = Vector3(rng.uniform(-50, 50), rng.uniform(-50, 50), 0)
+        shape.angular_velocity = Vector3(rng.uniform(-90, 90), rng.uniform(-90, 90), 0)
+        world.add_shape(shape)
+    return world
+
+
+def time_per_frame(step, frames: int) -> float:
+    """Times a callable stepping a world.
+
+    Args:
+        step: Called once per frame with the delta time.
+        frames: Number of frames to time.
+
+    Returns:
+        Average time per frame (seconds).
+    """
+    start = time.perf_counter()
+    for _ in range(frames):
+        step(1/100)
+    return (time.perf_counter() - start)/frames
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--counts", type=int, nargs="+", default=[1000, 10000, 100000])
+    parser.add_argument("--frames", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{'solids':>8} {'batched (ms)':>14} {'per shape (ms)':>16} {'speedup':>9}")
+    for count in args.counts:
+        world = make_world(count)
+        batched = time_per_frame(world.update, args.frames)
+
+        def step_per_shape(dt: float, shapes=world.active_shapes) -> None:
+            for shape in shapes:
+                shape.update(dt)
+        # The per shape path is orders of magnitude slower, a few frames are enough.
+        per_shape = time_per_frame(step_per_shape, max(1, args.frames//10))
+        print(f"{count:>8} {batched*1000:>14.2f} {per_shape*1000:>16.2f} "
+              f"{per_shape/batched:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""Measures the memory used per shape by very large worlds.
+
+The compact layout (slotted shapes, shared float32/int32 meshes, shared kinematics arrays) is
+compared with the previous layout where each shape was a regular object holding its own list of
+`pygame.Vector3` vertices, list of edges and two velocity vectors.
+
+Usage:
+    python benchmarks/bench_memory.py [--count 1000000] [--legacy-count 100000]
+"""
+
+import argparse
+import os
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# pylint: disable=wrong-import-position
+from pygame import Vector3
+
+from config import Color
+from camera import Camera
+from shape_factory import ShapeFactory
+from world import World
+
+__author__ = "Jye-Ming Serres"
+
+
+SHAPE_NAMES = ("tetrahedron", "cube", "octahedron", "dodecahedron", "icosahedron")
+
+
+class LegacyShape:
+    """Replicates the memory layout of shapes before they were made compact."""
+
+    def __init__(self, center: Vector3, vertices: list[Vector3], edges: list[tuple[int, int]],
+                 color: Color) -> None:
+        self._center = center
+        self._vertices = vertices
+        self._edges = edges
+        self._color = color
+        self.rectilinear_velocity = Vector3(0, 0, 0)
+        self.angular_velocity = Vector3(0, 0, 0)
+
+
+def make_legacy_shapes(count: int) -> list[LegacyShape]:
+    """Creates shapes with the legacy layout.
+
+    Args:
+        count: Number of shapes.
+
+    Returns:
+        The shapes.
+    """
+    shape_factory = ShapeFactory()
+    shapes = []
+    for i in range(count):
+        pos = Vector3(i, 0, 0)
+        mesh = shape_factory.make_shape(SHAPE_NAMES[i % len(SHAPE_NAMES)], pos, 100,
+                                        Color.WHITE).mesh
+        vertices = [Vector3(tuple(vertex)) + pos for vertex in mesh.vertices.tolist()]
+        edges = [tuple(edge) for edge in mesh.edges.tolist()]
+        shapes.append(LegacyShape(pos, vertices, edges, Color.WHITE))
+    return shapes
+
+
+def make_world(count: int) -> World:
+    """Creates a world of shapes with the compact layout.
+
+    Args:
+        count: Number of shapes.
+
+    Returns:
+        The world.
+    """
+    shape_factory = ShapeFactory()
+    world = World(Camera(Vector3(0, 0, 0), 360), [])
+    for i in range(count):
+        shape = shape_factory.make_shape(SHAPE_NAMES[i % len(SHAPE_NAMES)], Vector3(i, 0, 0), 100,
+                                         Color.WHITE)
+        world.add_shape(shape)
+    return world
+
+
+def traced_bytes(build, count: int) -> tuple[object, int]:
+    """Measures the memory allocated and kept by a builder.
+
+    Args:
+        build: Called with the count, returns the built objects.
+        count: Number of shapes to build.
+
+    Returns:
+        The built objects and the bytes they hold.
+    """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    built = build(count)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return built, after - before
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--count", type=int, default=1_000_000)
+    parser.add_argument("--legacy-count", type=int, default=100_000,
+                        help="the legacy layout grows linearly and is measured on fewer shapes")
+    args = parser.parse_args()
+
+    world, compact_bytes = traced_bytes(make_world, args.count)
+    _, legacy_bytes = traced_bytes(make_legacy_shapes, args.legacy_count)
+
+    print(f"compact layout, {args.count} shapes:")
+    for key, value in world.memory_report().items():
+        print(f"    {key:>16}: {value}")
+    print(f"    {'traced':>16}: {compact_bytes} ({compact_bytes/args.count:.0f} bytes/shape)")
+    print(f"legacy layout, {args.legacy_count} shapes:")
+    print(f"    {'traced':>16}: {legacy_bytes} ({legacy_bytes/args.legacy_count:.0f} bytes/shape)")
+    print(f"legacy/compact: {legacy_bytes/args.legacy_count/(compact_bytes/args.count):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
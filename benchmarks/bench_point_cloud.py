@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Measures progressive rendering of a large memory-mapped point cloud.
+
+A point cloud is written to a temporary `.npy` file, then drawn from a still camera until every
+point has been drawn. Reports the time of the first (coarse) frame, the worst frame and the number
+of frames until the point cloud is complete.
+
+Usage:
+    python benchmarks/bench_point_cloud.py [--points 10000000] [--format npy]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# Rendering happens off-screen, no window is needed.
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+# pylint: disable=wrong-import-position
+import numpy as np
+import pygame
+from pygame import Vector3
+
+from config import SCREEN_WIDTH, SCREEN_HEIGHT, POINT_CLOUD_FRAME_BUDGET
+from camera import Camera
+from display import Display
+from point_cloud import PointCloud
+from world import World
+
+__author__ = "Jye-Ming Serres"
+
+
+def write_sphere(path: str, count: int, raw: bool) -> None:
+    """Writes points scattered on a sphere in front of the camera, one block at a time.
+
+    Args:
+        path: Where the point cloud is written.
+        count: Number of points.
+        raw: Whether to write raw float32 triplets instead of a `.npy` file.
+    """
+    if raw:
+        points = np.memmap(path, dtype="<f4", mode="w+", shape=(count, 3))
+    else:
+        points = np.lib.format.open_memmap(path, mode="w+", dtype="<f4", shape=(count, 3))
+    rng = np.random.default_rng(0)
+    block = 1 << 20
+    for start in range(0, count, block):
+        directions = rng.normal(size=(min(block, count - start), 3))
+        directions /= np.linalg.norm(directions, axis=1, keepdims=True)
+        points[start:start + len(directions)] = directions*500 + (1500, 0, 0)
+    points.flush()
+    del points
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--points", type=int, default=10_000_000)
+    parser.add_argument("--format", choices=("npy", "raw"), default="npy")
+    args = parser.parse_args()
+
+    pygame.init()
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, f"cloud.{args.format}")
+        write_sphere(path, args.points, args.format == "raw")
+
+        world = World(Camera(Vector3(0, 0, 0), 360), [])
+        point_cloud = PointCloud.from_file(path)
+        world.add_point_cloud(point_cloud)
+        display = Display(pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)))
+        viewport = display._get_viewports(world)[0] # pylint: disable=protected-access
+
+        frame_times = []
+        while not frame_times or viewport.point_cloud_layer[2][0] < point_cloud.pass_count:
+            start = time.perf_counter()
+            display.draw(world, 0)
+            frame_times.append(time.perf_counter() - start)
+        del point_cloud, world, display, viewport # releases the memory map before cleaning up
+
+    print(f"points:              {args.points:,}")
+    print(f"budget:              {POINT_CLOUD_FRAME_BUDGET:,} points/frame")
+    print(f"first frame:         {frame_times[0]*1000:.1f} ms")
+    print(f"worst frame:         {max(frame_times)*1000:.1f} ms")
+    print(f"frames to complete:  {len(frame_times)}")
+    print(f"time to complete:    {sum(frame_times):.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""Compares the throughput of the rasterizers in edges/second.
+
+Random short edges are drawn onto an off-screen surface the size of the screen.
+
+Usage:
+    python benchmarks/bench_rasterizer.py [--edges 10000 100000 500000] [--length 12] [--repeat 3]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# pylint: disable=wrong-import-position
+import numpy as np
+import pygame
+
+from config import SCREEN_WIDTH, SCREEN_HEIGHT
+from display import RASTERIZERS
+
+__author__ = "Jye-Ming Serres"
+
+
+def make_segments(count: int, length: float) -> tuple[np.ndarray, np.ndarray]:
+    """Creates random edges within the screen.
+
+    Args:
+        count: Number of edges.
+        length: Average length of an edge in pixels.
+
+    Returns:
+        The segments (x0, y0, x1, y1) and their colors.
+    """
+    rng = np.random.default_rng(0)
+    starts = rng.uniform((0, 0), (SCREEN_WIDTH, SCREEN_HEIGHT), (count, 2))
+    ends = starts + rng.uniform(-length, length, (count, 2))
+    colors = rng.integers(0, 0xFFFFFF, count)
+    return np.concatenate((starts, ends), axis=1), colors
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--edges", type=int, nargs="+", default=[10000, 100000, 500000])
+    parser.add_argument("--length", type=float, default=12)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+    print(f"{'edges':>8} " + " ".join(f"{kind.name + ' (edges/s)':>20}" for kind in RASTERIZERS))
+    for count in args.edges:
+        segments, colors = make_segments(count, args.length)
+        throughputs = []
+        for kind in RASTERIZERS:
+            rasterizer = kind()
+            start = time.perf_counter()
+            for _ in range(args.repeat):
+                rasterizer.draw_segments(surface, segments, colors)
+            throughputs.append(count*args.repeat/(time.perf_counter() - start))
+        print(f"{count:>8} " + " ".join(f"{throughput:>20,.0f}" for throughput in throughputs))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""Compares moving a compound object part by part with moving the group holding its parts.
+
+Each frame, the object is moved and rotated, then the world space vertices of a fraction of its
+parts are requested, as if only those parts were drawn.
+
+Usage:
+    python benchmarks/bench_scene_graph.py [--parts 1000 10000] [--drawn 0.1] [--frames 20]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# pylint: disable=wrong-import-position
+from pygame import Vector3
+
+from config import Color
+from camera import Camera
+from node import Group
+from shape_factory import ShapeFactory
+from world import World
+
+__author__ = "Jye-Ming Serres"
+
+
+def make_world(parts: int, grouped: bool) -> tuple[World, Group | None]:
+    """Creates a world holding a compound object made of cubes.
+
+    Args:
+        parts: Number of cubes.
+        grouped: Whether the cubes belong to a group.
+
+    Returns:
+        The world and the group, `None` if the cubes are not grouped.
+    """
+    rng = random.Random(0)
+    shape_factory = ShapeFactory()
+    world = World(Camera(Vector3(0, 0, 0), 360), [])
+    group = None
+    if grouped:
+        group = Group(Vector3(5000, 0, 0))
+        world.add_group(group)
+    for _ in range(parts):
+        pos = Vector3(rng.uniform(-1e3, 1e3), rng.uniform(-1e3, 1e3), rng.uniform(-1e3, 1e3))
+        if not grouped:
+            pos += Vector3(5000, 0, 0)
+        world.add_shape(shape_factory.make_shape("cube", pos, 10, Color.WHITE), group)
+    return world, group
+
+
+def time_per_frame(parts: int, drawn: float, frames: int, grouped: bool) -> float:
+    """Times moving the object then refreshing the vertices of the drawn parts.
+
+    Args:
+        parts: Number of parts of the object.
+        drawn: Fraction of the parts whose vertices are requested every frame.
+        frames: Number of frames to time.
+        grouped: Whether the object is moved through its group or part by part.
+
+    Returns:
+        Average time per frame (seconds).
+    """
+    world, group = make_world(parts, grouped)
+    displacement = Vector3(1, 0, 0)
+    angular_displacement = Vector3(0, 0, 1)
+    shapes = world.shapes
+    drawn_shapes = shapes[:int(parts*drawn)]
+    center = Vector3(5000, 0, 0)
+    start = time.perf_counter()
+    for _ in range(frames):
+        if grouped:
+            group.move(displacement)
+            group.rotate(angular_displacement)
+        else:
+            # Rotating the object around its center also moves the center of every part.
+            for shape in shapes:
+                offset = shape.center - center
+                shape.move(displacement + offset.rotate(angular_displacement.z, (0, 0, 1))
+                           - offset)
+                shape.rotate(angular_displacement)
+            center += displacement
+        for shape in drawn_shapes:
+            _ = shape.vertices
+    return (time.perf_counter() - start)/frames
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--parts", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--drawn", type=float, default=0.1)
+    parser.add_argument("--frames", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"{'parts':>8} {'part by part (ms)':>19} {'group (ms)':>12} {'speedup':>9}")
+    for parts in args.parts:
+        separate = time_per_frame(parts, args.drawn, args.frames, grouped=False)
+        grouped = time_per_frame(parts, args.drawn, args.frames, grouped=True)
+        print(f"{parts:>8} {separate*1000:>19.2f} {grouped*1000:>12.2f} "
+              f"{separate/grouped:>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
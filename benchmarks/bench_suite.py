@@ -0,0 +1,236 @@
+#!/usr/bin/env python3
+"""Times the hot paths of the program at several scene sizes and detects regressions.
+
+Results can be saved as a JSON baseline and later runs compared against it. A case regresses when
+its time per call grows by more than the threshold, in which case the exit status is 1.
+
+Usage:
+    python benchmarks/bench_suite.py [--sizes 5 100 2000] [--cases world_update draw_world ...]
+                                     [--repeat 5] [--save baseline.json]
+                                     [--compare baseline.json] [--threshold 15]
+"""
+
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import sys
+import time
+from typing import Callable
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# Rendering happens off-screen, no window is needed.
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+# pylint: disable=wrong-import-position,protected-access
+import numpy as np
+import pygame
+from pygame import Vector3
+
+from config import Color, SCREEN_WIDTH, SCREEN_HEIGHT
+from camera import Camera
+from display import Display
+from shape_factory import ShapeFactory
+from world import World
+
+__author__ = "Jye-Ming Serres"
+
+
+SHAPE_NAMES = ("tetrahedron", "cube", "octahedron", "dodecahedron", "icosahedron")
+
+
+def make_world(size: int, colors: tuple[Color, ...] = (Color.WHITE,)) -> World:
+    """Creates a world of moving solids scattered in front of the camera.
+
+    Args:
+        size: Number of solids.
+        colors: Colors given to the solids in turn.
+
+    Returns:
+        The world.
+    """
+    rng = random.Random(0)
+    shape_factory = ShapeFactory()
+    world = World(Camera(Vector3(0, 0, 0), 360), [])
+    for i in range(size):
+        pos = Vector3(rng.uniform(2e3, 2e4), rng.uniform(-1e4, 1e4), rng.uniform(-1e4, 1e4))
+        shape = shape_factory.make_shape(SHAPE_NAMES[i % len(SHAPE_NAMES)], pos, 100,
+                                         colors[i % len(colors)])
+        shape.rectilinear_velocity = Vector3(rng.uniform(-50, 50), rng.uniform(-50, 50), 0)
+        shape.angular_velocity = Vector3(rng.uniform(-90, 90), rng.uniform(-90, 90), 0)
+        world.add_shape(shape)
+    return world
+
+
+def case_make_shape(size: int) -> Callable[[], None]:
+    """`ShapeFactory.make_shape` for every solid of a scene."""
+    shape_factory = ShapeFactory()
+    def run() -> None:
+        for i in range(size):
+            shape_factory.make_shape(SHAPE_NAMES[i % len(SHAPE_NAMES)], Vector3(i, 0, 0), 100,
+                                     Color.WHITE)
+    return run
+
+
+def case_shape_move_rotate(size: int) -> Callable[[], None]:
+    """`Shape.move` then `Shape.rotate` on every solid of a scene."""
+    shapes = make_world(size).shapes
+    displacement = Vector3(1, 0, 0)
+    angular_displacement = Vector3(1, 2, 0)
+    def run() -> None:
+        for shape in shapes:
+            shape.move(displacement)
+            shape.rotate(angular_displacement)
+    return run
+
+
+def case_world_update(size: int) -> Callable[[], None]:
+    """`World.update` of a scene where every solid moves."""
+    world = make_world(size)
+    return lambda: world.update(1/100)
+
+
+def case_camera_rotate(size: int) -> Callable[[], None]:
+    """`Camera.rotate`, once per solid of a scene."""
+    camera = Camera(Vector3(0, 0, 0), 360)
+    angular_displacement = Vector3(0.1, 0.2, 0)
+    def run() -> None:
+        for _ in range(size):
+            camera.rotate(angular_displacement)
+    return run
+
+
+def case_depth_sort(size: int) -> Callable[[], None]:
+    """Depth sorting of a scene after the camera turned back and forth."""
+    world = make_world(size)
+    display = Display(pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)))
+    viewport = display._get_viewports(world)[0]
+    angular_displacements = itertools.cycle((Vector3(0.1, 0, 0), Vector3(-0.1, 0, 0)))
+    def run() -> None:
+        world.camera.rotate(next(angular_displacements))
+        display._sort_shapes(world, viewport)
+    return run
+
+
+def case_draw_world(size: int) -> Callable[[], None]:
+    """`Display._draw_world` of a scene on an off-screen surface after the camera turned back and
+    forth."""
+    world = make_world(size)
+    display = Display(pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT)))
+    angular_displacements = itertools.cycle((Vector3(0.1, 0, 0), Vector3(-0.1, 0, 0)))
+    def run() -> None:
+        world.camera.rotate(next(angular_displacements))
+        display._draw_world(world, display._get_viewports(world))
+    return run
+
+
+CASES = {
+    "make_shape": case_make_shape,
+    "shape_move_rotate": case_shape_move_rotate,
+    "world_update": case_world_update,
+    "camera_rotate": case_camera_rotate,
+    "depth_sort": case_depth_sort,
+    "draw_world": case_draw_world,
+    }
+
+
+def time_call(run: Callable[[], None], repeat: int, min_time: float = 0.2) -> float:
+    """Times a callable, keeping the fastest of several rounds to filter out noise.
+
+    Args:
+        run: The callable to time.
+        repeat: Number of rounds.
+        min_time: Minimum duration (seconds) of a round. Fast callables are called several times
+            per round.
+
+    Returns:
+        Time per call (seconds) of the fastest round.
+    """
+    run() # warm-up, fills caches a real frame would have filled
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            run()
+        if time.perf_counter() - start >= min_time or number >= 1 << 20:
+            break
+        number *= 2
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            run()
+        best = min(best, (time.perf_counter() - start)/number)
+    return best
+
+
+def compare(results: dict[str, float], baseline: dict[str, float],
+            threshold: float) -> list[str]:
+    """Finds the cases slower than their baseline.
+
+    Args:
+        results: Time per call (seconds) of each case.
+        baseline: Time per call (seconds) of each case in the baseline.
+        threshold: Allowed slowdown (percent).
+
+    Returns:
+        A description of each regression.
+    """
+    regressions = []
+    for name, seconds in results.items():
+        if name in baseline and seconds > baseline[name]*(1 + threshold/100):
+            change = (seconds/baseline[name] - 1)*100
+            regressions.append(f"{name}: {baseline[name]*1000:.3f} ms -> {seconds*1000:.3f} ms "
+                               f"(+{change:.0f}%)")
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 100, 2000])
+    parser.add_argument("--cases", nargs="+", choices=CASES, default=list(CASES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--save", metavar="JSON", help="save the results as a baseline")
+    parser.add_argument("--compare", metavar="JSON", help="baseline to compare the results with")
+    parser.add_argument("--threshold", type=float, default=15,
+                        help="slowdown (percent) beyond which a case is a regression")
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.compare is not None:
+        with open(args.compare, encoding="utf-8") as file:
+            baseline = json.load(file)["results"]
+
+    pygame.init()
+    results = {}
+    print(f"{'case':<28} {'ms/call':>10} {'baseline':>10} {'change':>8}")
+    for case in args.cases:
+        for size in args.sizes:
+            name = f"{case}[{size}]"
+            results[name] = time_call(CASES[case](size), args.repeat)
+            line = f"{name:<28} {results[name]*1000:>10.3f}"
+            if name in baseline:
+                change = (results[name]/baseline[name] - 1)*100
+                line += f" {baseline[name]*1000:>10.3f} {change:>+7.0f}%"
+            print(line)
+
+    if args.save is not None:
+        with open(args.save, "w", encoding="utf-8") as file:
+            json.dump({"python": platform.python_version(), "numpy": np.__version__,
+                       "pygame": pygame.version.ver, "machine": platform.machine(),
+                       "results": results}, file, indent=4)
+
+    regressions = compare(results, baseline, args.threshold)
+    if regressions:
+        print(f"\n{len(regressions)} case(s) regressed by more than {args.threshold:g}%:")
+        for regression in regressions:
+            print("    " + regression)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Measures how tiled rasterization scales with the number of worker threads.
+
+Random edges are drawn onto an off-screen surface the size of the screen, by each rasterizer alone
+then through tiles drawn by an increasing number of threads. Threads can only help on a machine
+with several cores, and only as much as the rasterizer releases the GIL.
+
+Usage:
+    python benchmarks/bench_tiled.py [--edges 200000] [--length 12] [--threads 1 2 4 8]
+                                     [--tile-sizes 64 128 256] [--repeat 3]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
+
+# pylint: disable=wrong-import-position
+import numpy as np
+import pygame
+from pygame.surface import Surface
+
+from config import SCREEN_WIDTH, SCREEN_HEIGHT
+from rasterizer import Rasterizer, AalineRasterizer, PixelRasterizer, TiledRasterizer
+from bench_rasterizer import make_segments
+
+__author__ = "Jye-Ming Serres"
+
+
+def time_per_frame(rasterizer: Rasterizer, surface: Surface, segments: np.ndarray,
+                   colors: np.ndarray, repeat: int) -> float:
+    """Times drawing every segment at once.
+
+    Args:
+        rasterizer: Draws the segments.
+        surface: The surface drawn on.
+        segments: Coordinates (x0, y0, x1, y1) of each segment. Shape (e, 4).
+        colors: Mapped color of each segment. Shape (e,).
+        repeat: Number of frames to time.
+
+    Returns:
+        Average time per frame (seconds).
+    """
+    rasterizer.draw_segments(surface, segments, colors) # starts the worker threads
+    start = time.perf_counter()
+    for _ in range(repeat):
+        rasterizer.draw_segments(surface, segments, colors)
+    return (time.perf_counter() - start)/repeat
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--edges", type=int, default=200_000)
+    parser.add_argument("--length", type=float, default=12)
+    parser.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--tile-sizes", type=int, nargs="+", default=[64, 128, 256])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+    segments, colors = make_segments(args.edges, args.length)
+    print(f"{args.edges:,} edges, {os.cpu_count()} cores")
+    print(f"{'rasterizer':>10} {'tile':>5} {'threads':>8} {'frame (ms)':>11} {'speedup':>8}")
+    for kind in (PixelRasterizer, AalineRasterizer):
+        alone = time_per_frame(kind(), surface, segments, colors, args.repeat)
+        print(f"{kind.name:>10} {'-':>5} {'-':>8} {alone*1000:>11.1f} {1:>7.2f}x")
+        for tile_size in args.tile_sizes:
+            for thread_count in args.threads:
+                rasterizer = TiledRasterizer(kind(), tile_size, thread_count)
+                tiled = time_per_frame(rasterizer, surface, segments, colors, args.repeat)
+                rasterizer.close()
+                print(f"{kind.name:>10} {tile_size:>5} {thread_count:>8} {tiled*1000:>11.1f} "
+                      f"{alone/tiled:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
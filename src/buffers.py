@@ -0,0 +1,28 @@
+"""Reuse arrays from frame to frame instead of allocating new ones.
+
+Functions:
+    reserve()
+"""
+
+import numpy as np
+
+__author__ = "Jye-Ming Serres"
+
+
+def reserve(buffer: np.ndarray, length: int) -> np.ndarray:
+    """Makes sure a buffer holds at least a number of rows.
+
+    The buffer is only replaced when it is too small, by one at least twice as large, so that a
+    buffer used every frame stops being reallocated once it reached its steady-state size.
+
+    Args:
+        buffer: The buffer currently in use.
+        length: Number of rows needed.
+
+    Returns:
+        The buffer itself if it is large enough, otherwise a new uninitialized buffer with the same
+        dtype and row shape.
+    """
+    if len(buffer) >= length:
+        return buffer
+    return np.empty((max(length, 2*len(buffer)),) + buffer.shape[1:], dtype=buffer.dtype)
@@ -4,8 +4,13 @@ Classes:
     Camera
 """
 
+import math
+
+import numpy as np
 from pygame import Vector3
 
+from config import CAMERA_ORTHONORMALIZE_INTERVAL
+
 __author__ = "Jye-Ming Serres"
 
 
@@ -19,10 +24,15 @@ class Camera:
             velocity in degrees/second around `image_y` (yaw), `image_x` (pitch) then 
             `orientation` (roll), in that order.
 
+    The aperture and the basis should only be changed through `move()`, `rotate()`, `set_pose()`
+    and `look_at()`, otherwise the cached view matrix is not invalidated.
+
     Methods:
         update()
         move()
         rotate()
+        set_pose()
+        look_at()
     """
 
     def __init__(self, aperture: Vector3, focal_length: float) -> None:
@@ -38,6 +48,11 @@ class Camera:
         self._orientation = self._calculate_orientation()
         self._focal_length = focal_length
 
+        self._view_matrix = np.empty((3, 4))
+        self._view_matrix_dirty = True
+        self._pose_version = 0
+        self._rotations_since_orthonormalization = 0
+
         self.rectilinear_velocity = Vector3(0, 0, 0)
         self.angular_velocity = Vector3(0, 0, 0)
 
@@ -66,17 +81,39 @@ class Camera:
         """Distance between the aperture and the image plane. Influences FOV."""
         return self._focal_length
 
+    @property
+    def pose_version(self) -> int:
+        """Incremented every time the camera actually moves or rotates."""
+        return self._pose_version
+
+    @property
+    def view_matrix(self) -> np.ndarray:
+        """3x4 matrix projecting homogeneous world coordinates onto the image plane.
+
+        Multiplying a point (x, y, z, 1) gives (u, v, w) where w is the point's distance to the 
+        image plane and (u/w, v/w) its coordinates on the image plane relative to the image center. 
+        The matrix is only rebuilt after the camera moves or rotates.
+        """
+        if self._view_matrix_dirty:
+            self._build_view_matrix()
+        return self._view_matrix
+
     def update(self, dt: float) -> None:
         """Applies the camera's rectilinear and angular velocity accross a time interval.
 
         Args:
             dt: Delta time (seconds).   
         """
-        self.move(self.rectilinear_velocity * dt)
+        velocity = self.rectilinear_velocity
+        if velocity.x != 0 or velocity.y != 0 or velocity.z != 0:
+            self.move(velocity*dt)
         self.rotate(self.angular_velocity)
 
     def move(self, displacement: Vector3) -> None:
+        if displacement.x == 0 and displacement.y == 0 and displacement.z == 0:
+            return
         self._aperture += displacement
+        self._invalidate_pose()
 
     def rotate(self, angular_displacement: Vector3) -> None:
         """Rotates the camera around its aperture.
@@ -85,12 +122,22 @@ class Camera:
             angular_displacement: Counterclockwise rotation in degrees around `image_y` (yaw), 
                 `image_x` (pitch) then `orientation` (roll), in that order.
         """
+        if angular_displacement[0] == 0 and angular_displacement[1] == 0 \
+                and angular_displacement[2] == 0:
+            return
         self._image_x.rotate_ip(angular_displacement[0], self._image_y) # yaw
         self._image_y.rotate_ip(angular_displacement[1], self._image_x) # pitch
         self._orientation = self._calculate_orientation()
         self._image_x.rotate_ip(angular_displacement[2], self._orientation) # roll
         self._image_y.rotate_ip(angular_displacement[2], self._orientation) # roll
 
+        # Incremental rotations accumulate rounding errors and the basis slowly drifts from being
+        # orthonormal, so it is periodically rebuilt.
+        self._rotations_since_orthonormalization += 1
+        if self._rotations_since_orthonormalization >= CAMERA_ORTHONORMALIZE_INTERVAL:
+            self._orthonormalize()
+        self._invalidate_pose()
+
     def _calculate_orientation(self) -> Vector3:
         """Calculates the orientation of the camera.
 
@@ -100,3 +147,76 @@ class Camera:
             Orientation vector. (normalized)
         """
         return self._image_y.cross(self._image_x).normalize()
+
+    def set_pose(self, aperture: Vector3, image_x: Vector3, image_y: Vector3,
+                 focal_length: float = None) -> None:
+        """Places and orients the camera directly.
+
+        Args:
+            aperture: New position of the aperture.
+            image_x: New direction of the x coordinate of the image. Orthonormalized with image_y.
+            image_y: New direction of the y coordinate of the image.
+            focal_length: New distance between the aperture and the image plane. Unchanged if 
+                `None`.
+
+        Raises:
+            ValueError: If a coordinate is not finite, the image directions are zero or parallel,
+                or the focal length is not positive. The camera is left unchanged then.
+        """
+        values = [*aperture, *image_x, *image_y]
+        if focal_length is not None:
+            if not focal_length > 0:
+                raise ValueError(f"Expected a positive focal length, got {focal_length}")
+            values.append(focal_length)
+        if not all(math.isfinite(value) for value in values):
+            raise ValueError(f"Expected finite coordinates, got {values}")
+        try:
+            new_image_x = Vector3(image_x).normalize()
+            new_image_y = Vector3(image_y)
+            new_image_y -= new_image_y.dot(new_image_x)*new_image_x
+            new_image_y.normalize_ip()
+        except ValueError as error:
+            raise ValueError(f"Expected image directions neither zero nor parallel, got "
+                             f"{list(image_x)} and {list(image_y)}") from error
+        self._aperture.update(aperture)
+        self._image_x.update(new_image_x)
+        self._image_y.update(new_image_y)
+        self._orthonormalize()
+        if focal_length is not None:
+            self._focal_length = focal_length
+        self._invalidate_pose()
+
+    def look_at(self, target: Vector3, up: Vector3 = Vector3(0, 0, 1)) -> None:
+        """Orients the camera towards a point, keeping the image's y coordinate on the up side.
+
+        Args:
+            target: The point to look at. Must differ from the aperture.
+            up: Direction that should appear upwards on the image. Must not be parallel to the 
+                direction of the target.
+        """
+        forward = (target - self._aperture).normalize()
+        image_x = forward.cross(up).normalize()
+        self.set_pose(self._aperture, image_x, image_x.cross(forward))
+
+    def _orthonormalize(self) -> None:
+        """Rebuilds an orthonormal basis from `image_x` and `image_y` (Gram-Schmidt process)."""
+        self._image_x.normalize_ip()
+        self._image_y -= self._image_y.dot(self._image_x)*self._image_x
+        self._image_y.normalize_ip()
+        self._orientation = self._calculate_orientation()
+        self._rotations_since_orthonormalization = 0
+
+    def _invalidate_pose(self) -> None:
+        """Marks the view matrix as outdated and bumps the pose version."""
+        self._view_matrix_dirty = True
+        self._pose_version += 1
+
+    def _build_view_matrix(self) -> None:
+        """Rebuilds the cached view matrix from the aperture, the basis and the focal length."""
+        matrix = self._view_matrix
+        matrix[0, :3] = self._image_x
+        matrix[1, :3] = self._image_y
+        matrix[2, :3] = self._orientation
+        matrix[:2, :3] *= self._focal_length
+        matrix[:, 3] = -(matrix[:, :3] @ tuple(self._aperture))
+        self._view_matrix_dirty = False
@@ -109,19 +109,30 @@ class CameraController:
         Args:
             mouse_motion: Mouse motion in (x, y) since the last frame.
         """
-        self.camera.angular_velocity = -self.look_sens*Vector3(mouse_motion[0], mouse_motion[1], 0)
+        self.camera.angular_velocity.update(-self.look_sens*mouse_motion[0],
+                                            -self.look_sens*mouse_motion[1], 0)
 
     def update(self) -> None:
         """Reevaluates the camera's rectilinear velocity."""
         self.sm_medial.update()
         self.sm_lateral.update()
         self.sm_vertical.update()
-        if self._rel_direction.length() == 0:
-            self.camera.rectilinear_velocity = Vector3(0, 0, 0)
+        # The camera's velocity is updated in place rather than replaced every frame.
+        velocity = self.camera.rectilinear_velocity
+        length = self._rel_direction.length()
+        if length == 0:
+            velocity.update(0, 0, 0)
         else:
-            rel_vel = self.speed * self._rel_direction.normalize()
-            self.camera.rectilinear_velocity =  (rel_vel.x*self.camera.orientation
-                + rel_vel.y*self.camera.image_x + rel_vel.z*self.camera.image_y)
+            scale = self.speed/length
+            medial = self._rel_direction.x*scale
+            lateral = self._rel_direction.y*scale
+            vertical = self._rel_direction.z*scale
+            orientation = self.camera.orientation
+            image_x = self.camera.image_x
+            image_y = self.camera.image_y
+            velocity.update(medial*orientation.x + lateral*image_x.x + vertical*image_y.x,
+                            medial*orientation.y + lateral*image_x.y + vertical*image_y.y,
+                            medial*orientation.z + lateral*image_x.z + vertical*image_y.z)
 
 
 class SCam(State):
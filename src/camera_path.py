@@ -0,0 +1,94 @@
+"""Script the movement of a camera over time.
+
+Classes:
+    CameraPath
+"""
+
+import json
+
+from pygame import Vector3
+
+from camera import Camera
+
+__author__ = "Jye-Ming Serres"
+
+
+# Time (seconds), camera position and point the camera looks at
+Keyframe = tuple[float, Vector3, Vector3]
+
+
+class CameraPath:
+    """Moves a camera through keyframes, interpolating linearly in between.
+
+    Methods:
+        from_json()
+        pose()
+        apply()
+    """
+
+    def __init__(self, keyframes: list[Keyframe]) -> None:
+        """Creates an instance from keyframes.
+
+        Args:
+            keyframes: At least one (time, position, target) keyframe. They do not need to be 
+                sorted.
+
+        Raises:
+            ValueError: If there are no keyframes.
+        """
+        if not keyframes:
+            raise ValueError("A camera path needs at least one keyframe")
+        self._keyframes = sorted(keyframes, key=lambda keyframe: keyframe[0])
+
+    @classmethod
+    def from_json(cls, path: str) -> "CameraPath":
+        """Loads keyframes from a JSON file.
+
+        The file contains a list of objects like `{"time": 0, "position": [0, 0, 0], 
+        "target": [600, 0, 0]}`.
+
+        Args:
+            path: Path of the JSON file.
+
+        Returns:
+            The camera path.
+        """
+        with open(path, encoding="utf-8") as file:
+            keyframes = json.load(file)
+        return cls([(keyframe["time"], Vector3(keyframe["position"]), Vector3(keyframe["target"]))
+                    for keyframe in keyframes])
+
+    @property
+    def duration(self) -> float:
+        """Time of the last keyframe (seconds)."""
+        return self._keyframes[-1][0]
+
+    def pose(self, time: float) -> tuple[Vector3, Vector3]:
+        """Interpolates the camera's position and target at a given time.
+
+        Args:
+            time: Time along the path (seconds). Clamped to the first and last keyframes.
+
+        Returns:
+            The position of the camera and the point it looks at.
+        """
+        previous = self._keyframes[0]
+        for keyframe in self._keyframes:
+            if keyframe[0] >= time:
+                if keyframe[0] == previous[0]:
+                    return keyframe[1], keyframe[2]
+                ratio = (time - previous[0])/(keyframe[0] - previous[0])
+                return previous[1].lerp(keyframe[1], ratio), previous[2].lerp(keyframe[2], ratio)
+            previous = keyframe
+        return previous[1], previous[2]
+
+    def apply(self, camera: Camera, time: float) -> None:
+        """Places and orients a camera as it should be at a given time.
+
+        Args:
+            camera: The camera to move.
+            time: Time along the path (seconds).
+        """
+        position, target = self.pose(time)
+        camera.set_pose(position, camera.image_x, camera.image_y)
+        camera.look_at(target)
@@ -0,0 +1,89 @@
+"""Clip line segments to a rectangle before they are drawn.
+
+Functions:
+    clip_segments()
+"""
+
+import numpy as np
+
+__author__ = "Jye-Ming Serres"
+
+
+def clip_segments(segments: np.ndarray, x_min: float, y_min: float, x_max: float, y_max: float,
+                  out: np.ndarray = None) -> tuple[np.ndarray, np.ndarray]:
+    """Clips segments to a rectangle with the Liang–Barsky algorithm, all segments at once.
+
+    Each segment is parametrized as P(t) = P0 + t*(P1 - P0), 0 <= t <= 1. For each of the four
+    boundaries, the segment either enters or leaves the inside half-plane at some t. The visible
+    part goes from the last entry to the first exit, and there is none if the segment leaves before
+    it enters. For more information:
+        https://en.wikipedia.org/wiki/Liang%E2%80%93Barsky_algorithm
+
+    Args:
+        segments: Coordinates (x0, y0, x1, y1) of each segment. Shape (e, 4).
+        x_min: Left boundary of the rectangle.
+        y_min: Top boundary of the rectangle.
+        x_max: Right boundary of the rectangle.
+        y_max: Bottom boundary of the rectangle.
+        out: Array of at least e rows, other than `segments`, the visible segments are written
+            into. A new array is allocated if `None`.
+
+    Returns:
+        The visible part of the segments that are at least partly inside the rectangle, shape
+        (k, 4), and a boolean mask over `segments` of the ones kept, shape (e,). The segments are
+        returned as is when they are all inside the rectangle, otherwise the visible segments are
+        the first k rows of `out` if given.
+    """
+    segments = np.asarray(segments, dtype=np.float64)
+    x0, y0, x1, y1 = segments.T
+
+    # Most segments are either entirely inside or on the outer side of a boundary, only the other
+    # ones go through the algorithm. The bounds of the segments are computed one at a time into the
+    # same array to keep the memory used low.
+    bounds = np.minimum(x0, x1) # left
+    accepted = bounds >= x_min
+    rejected = bounds > x_max
+    np.maximum(x0, x1, out=bounds) # right
+    accepted &= bounds <= x_max
+    rejected |= bounds < x_min
+    np.minimum(y0, y1, out=bounds) # top
+    accepted &= bounds >= y_min
+    rejected |= bounds > y_max
+    np.maximum(y0, y1, out=bounds) # bottom
+    accepted &= bounds <= y_max
+    rejected |= bounds < y_min
+    if accepted.all():
+        return segments, accepted
+    crossing = np.flatnonzero(~(accepted | rejected))
+
+    starts = segments[crossing, :2]
+    deltas = segments[crossing, 2:] - starts
+
+    # p*t <= q for each boundary: left, top, right, bottom.
+    p = np.concatenate((-deltas, deltas), axis=1)
+    q = np.stack((starts[:, 0] - x_min, starts[:, 1] - y_min,
+                  x_max - starts[:, 0], y_max - starts[:, 1]), axis=1)
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        ratios = q/p
+    t_enter = np.max(np.where(p < 0, ratios, 0), axis=1, initial=0)
+    t_leave = np.min(np.where(p > 0, ratios, 1), axis=1, initial=1)
+    # Segments parallel to a boundary are either entirely inside or entirely outside of it.
+    parallel_outside = ((p == 0) & (q < 0)).any(axis=1)
+    visible = (t_enter <= t_leave) & ~parallel_outside
+
+    # Endpoints inside the rectangle are kept as is rather than recomputed from t.
+    trimmed = segments[crossing]
+    trimmed[:, 2:] = np.where((t_leave < 1)[:, np.newaxis],
+                              starts + t_leave[:, np.newaxis]*deltas, trimmed[:, 2:])
+    trimmed[:, :2] = np.where((t_enter > 0)[:, np.newaxis],
+                              starts + t_enter[:, np.newaxis]*deltas, starts)
+
+    kept = accepted
+    kept[crossing[visible]] = True
+    rows = np.flatnonzero(kept)
+    clipped = np.take(segments, rows, axis=0, out=None if out is None else out[:len(rows)],
+                      mode="clip")
+    # Rows of the visible crossing segments among the kept ones.
+    clipped[np.searchsorted(rows, crossing[visible])] = trimmed[visible]
+    return clipped, kept
@@ -0,0 +1,198 @@
+"""Find the shapes of a world that overlap and make them react to each other.
+
+Classes:
+    Response
+    Collisions
+"""
+
+from enum import Enum
+
+import numpy as np
+
+from config import COLLISION_MAX_SLABS
+from shape import Shape
+from kinematics import Kinematics
+
+__author__ = "Jye-Ming Serres"
+
+
+class Response(Enum):
+    """How shapes react when they overlap."""
+    REPORT = "report" # overlapping pairs are only reported
+    STOP = "stop" # both shapes stop moving in a straight line, they keep spinning
+    BOUNCE = "bounce" # both shapes bounce off each other as perfectly elastic spheres
+
+
+class Collisions:
+    """Finds the pairs of shapes whose bounding spheres overlap, with sweep and prune.
+
+    Every shape is bounded by the sphere around its center that contains all of its vertices,
+    whatever its orientation. The extents of the spheres along the axis where the centers are the
+    most spread out (the sweep axis) are kept sorted from one update to the next. Shapes barely
+    move between two updates, so the previous order is nearly sorted and sorting it again is close
+    to linear. Only the shapes whose extents overlap along the sweep axis are then tested against
+    each other.
+
+    A single sweep axis leaves far too many candidates when the shapes are spread out in the two
+    other dimensions, as every shape overlaps a whole slice of the world. The second most spread
+    out axis is therefore cut into slabs at least as thick as the largest sphere (and no more than
+    `COLLISION_MAX_SLABS` of them), and the sweep is done within each slab. Every shape is listed
+    in the slab of its lowest point and the next one, so that it meets every shape it can overlap
+    exactly once.
+
+    Reactions only apply to shapes that do not belong to a group, whose velocities are relative to
+    their group. Shapes that do not move in a straight line are not pushed by the others: moving
+    shapes stop against them or bounce off them.
+
+    Attributes:
+        response (:obj:`Response`): How shapes react when they overlap.
+        pairs (`numpy.ndarray`): Indices of both shapes of each pair found overlapping by the last
+            update, the lowest first, sorted. Shape (k, 2).
+        candidate_count (`int`): Number of pairs of shapes found in the same slab with
+            overlapping extents along the sweep axis by the last update, before any other test.
+
+    Methods:
+        update()
+    """
+
+    def __init__(self, response: Response = Response.REPORT) -> None:
+        """Creates an instance that has found no pair yet.
+
+        Args:
+            response: How shapes react when they overlap.
+        """
+        self.response = response
+        self.pairs = np.empty((0, 2), dtype=np.intp)
+        self.candidate_count = 0
+        self._radii = np.empty(0)
+        self._free = np.empty(0, dtype=bool) # shapes that do not belong to a group
+        self._order = np.empty(0, dtype=np.intp) # entries of the shapes in sweep order
+        self._axes = None
+
+    def update(self, shapes: list[Shape], centers: np.ndarray, kinematics: Kinematics) -> None:
+        """Finds the overlapping pairs of shapes and makes them react.
+
+        Args:
+            shapes: Shapes of the world.
+            centers: Position of the center of each shape in world space. Shape (n, 3).
+            kinematics: Positions, orientations and velocities of every shape, a row per shape.
+        """
+        if len(self._radii) != len(shapes):
+            self._radii = np.array([shape.mesh.radius for shape in shapes], dtype=float)
+            self._free = np.array([shape.parent is None for shape in shapes], dtype=bool)
+            self._order = np.arange(2*len(shapes))
+        if len(shapes) < 2:
+            self.pairs = np.empty((0, 2), dtype=np.intp)
+            self.candidate_count = 0
+            return
+        self.pairs = self._find_pairs(centers)
+        if len(self.pairs) and self.response is not Response.REPORT:
+            self._respond(centers, kinematics)
+
+    def _find_pairs(self, centers: np.ndarray) -> np.ndarray:
+        """Sweeps the bounding spheres of the shapes within slabs of the world.
+
+        Args:
+            centers: Position of the center of each shape in world space. Shape (n, 3).
+
+        Returns:
+            The overlapping pairs, see `pairs`.
+        """
+        radii = self._radii
+        spreads = np.ptp(centers[::max(len(centers)//1024, 1)], axis=0) # a sample is enough
+        axes = tuple(np.argsort(-spreads, kind="stable")[:2].tolist())
+        if axes != self._axes:
+            self._order = np.arange(2*len(radii)) # the previous order is no help on other axes
+            self._axes = axes
+        sweep_axis, slab_axis = axes
+
+        # Entry 2i is shape i in the slab of its lowest point, entry 2i + 1 is shape i in the next
+        # slab. Entries are sorted by slab, then by the lowest point of their sphere along the
+        # sweep axis: the key of a slab is larger than the extent of every sphere in any slab
+        # before it, so the order of entries within a slab does not depend on the slab.
+
+        diameter = 2*radii.max()
+        thickness = max(diameter, spreads[slab_axis]/COLLISION_MAX_SLABS, 1e-9)
+        lows = centers[:, sweep_axis] - radii
+        lows -= lows.min()
+        slab_length = lows.max() + diameter + 1
+        first_slabs = np.floor((centers[:, slab_axis] - radii)/thickness)
+        first_slabs -= first_slabs.min()
+
+        order = self._order
+        shapes = order >> 1
+        slabs = first_slabs[shapes] + (order & 1)
+        keys = slabs*slab_length + lows[shapes]
+        resort = np.argsort(keys, kind="stable") # nearly sorted since the last update
+        order = order[resort]
+        keys = keys[resort]
+        slabs = slabs[resort]
+        shapes = shapes[resort]
+        self._order = order
+
+        # Along the sweep axis, the spheres overlapping the one of an entry are those of the
+        # following entries of the same slab until the first one starting after it ends.
+
+        ends = np.searchsorted(keys, keys + 2*radii[shapes], side="right")
+        counts = ends - np.arange(1, len(keys) + 1)
+        total = int(counts.sum())
+        self.candidate_count = total
+        starts = np.cumsum(counts) - counts
+        firsts = np.repeat(np.arange(len(keys)), counts)
+        seconds = firsts + 1 + np.arange(total) - np.repeat(starts, counts)
+
+        # Two shapes listed in two slabs together only keep the pair found in the later one. The
+        # extents along the third axis, a single coordinate per shape, rule out most candidates
+        # before their spheres are tested.
+
+        a = np.take(shapes, firsts)
+        b = np.take(shapes, seconds)
+        reach = np.take(radii, a) + np.take(radii, b)
+        depths = centers[:, 3 - sweep_axis - slab_axis]
+        keep = np.take(slabs, firsts) == np.maximum(np.take(first_slabs, a),
+                                                     np.take(first_slabs, b))
+        keep &= np.abs(np.take(depths, a) - np.take(depths, b)) < reach
+        a = a[keep]
+        b = b[keep]
+        reach = reach[keep]
+        offsets = centers[a] - centers[b]
+        overlapping = np.einsum("ij,ij->i", offsets, offsets) < reach*reach
+        pairs = np.stack((a[overlapping], b[overlapping]), axis=1)
+        pairs.sort(axis=1)
+        return pairs[np.lexsort((pairs[:, 1], pairs[:, 0]))]
+
+    def _respond(self, centers: np.ndarray, kinematics: Kinematics) -> None:
+        """Changes the velocities of the shapes of every overlapping pair.
+
+        Args:
+            centers: Position of the center of each shape in world space. Shape (n, 3).
+            kinematics: Positions, orientations and velocities of every shape, a row per shape.
+        """
+        velocities = kinematics.rectilinear_velocities
+        movable = self._free & velocities.any(axis=1)
+        a, b = self.pairs[:, 0], self.pairs[:, 1]
+        reacting = movable[a] | movable[b]
+        a, b = a[reacting], b[reacting]
+        if len(a) == 0:
+            return
+        rows = np.unique(np.concatenate((a, b)))
+        rows = rows[movable[rows]]
+
+        if self.response is Response.STOP:
+            kinematics.set_rows_velocities(rows, np.zeros((len(rows), 3), dtype=np.float32))
+            return
+
+        # Equal masses exchange the speed along the line between their centers, an immovable
+        # shape sends it back. Pairs already moving apart are left alone so that overlapping
+        # shapes do not bounce back and forth.
+
+        normals = centers[b] - centers[a]
+        distances = np.linalg.norm(normals, axis=1)
+        normals /= np.maximum(distances, 1e-9)[:, np.newaxis]
+        speeds = np.einsum("ij,ij->i", velocities[a] - velocities[b], normals)
+        speeds[(speeds < 0) | (distances == 0)] = 0
+        both = movable[a] & movable[b]
+        changes = np.zeros((len(velocities), 3))
+        np.add.at(changes, a, -(np.where(both, 1, 2)*movable[a]*speeds)[:, np.newaxis]*normals)
+        np.add.at(changes, b, (np.where(both, 1, 2)*movable[b]*speeds)[:, np.newaxis]*normals)
+        kinematics.set_rows_velocities(rows, velocities[rows] + changes[rows])
@@ -2,6 +2,7 @@
 """
 
 import math
+import os
 from enum import Enum
 
 __author__ = "Jye-Ming Serres"
@@ -11,10 +12,41 @@ __author__ = "Jye-Ming Serres"
 SCREEN_WIDTH = 960
 SCREEN_HEIGHT = 720
 TARGET_FRAME_RATE = 100
+RASTERIZER_BATCH_POINTS = 1 << 16 # points generated at once by the pixel rasterizer
+RASTERIZER_BATCH_SEGMENTS = 256 # segments converted to Python floats at once by aaline
+RASTERIZER_TILE_SIZE = 128 # width and height in pixels of the tiles of the tiled rasterizer
+RASTERIZER_THREADS = os.cpu_count() or 1 # worker threads of the tiled rasterizer
+CLIP_MARGIN = 2 # pixels around a viewport kept by clipping so that antialiased edges are unchanged
+PROGRESSIVE_BATCH_SHAPES = 64 # shapes projected at once per viewport within a frame budget
+PROGRESSIVE_REGION_SIZE = 64 # width and height in pixels of the cells redrawn within a budget
+POINT_CLOUD_CHUNK = 1 << 16 # points of a point cloud read and projected at once
+POINT_CLOUD_BLOCK = 2048 # contiguous points read together, a few pages of a point cloud file
+POINT_CLOUD_FRAME_BUDGET = 1 << 18 # points of point clouds drawn per frame, at least one chunk
+RENDER_SCALE_MIN = 0.5 # smallest fraction of the screen's resolution the world is drawn at
+RENDER_SCALE_STEP = 0.125 # change of the render scale at once
+RENDER_SCALE_WINDOW = 20 # frames whose average drawing time decides a change of render scale
+RENDER_SCALE_HEADROOM = 0.7 # fraction of the target time frames must stay under to scale up
+UI_FONT = "Verdana"
+UI_FONT_SIZE = 12
+UI_TEXT_CACHE_SIZE = 64 # rendered lines of UI text kept between frames
+FONT_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".cache", "projection", "fonts.json")
 
 # Camera controls
 CAMERA_LOOK_SENS = 0.1
 CAMERA_SPEED = 400
+CAMERA_ORTHONORMALIZE_INTERVAL = 100 # rotations between two re-orthonormalizations of the basis
+
+# Export
+EXPORT_QUEUE_SIZE = 32 # frames waiting to be written before rendering has to wait
+SERVER_QUEUE_SIZE = 16 # pose batches or frames waiting in the render server
+TELEMETRY_CAPACITY = 3600 # frames kept by the telemetry ring buffer
+
+# Simulation
+SHAPE_ORTHONORMALIZE_INTERVAL = 100 # steps between two re-orthonormalizations of orientations
+COLLISION_MAX_SLABS = 1024 # slabs the shapes are swept in by the collision broad phase, at most
+
+MESH_CACHE_SIZE = 64 # meshes kept by the shape factory to be shared between shapes
+SUBDIVISION_CACHE_SIZE = 16 # subdivided solids kept by the shape factory, at any size
 
 # Math constants
 GOLDEN_RATIO = (1 + math.sqrt(5))/2
@@ -4,39 +4,112 @@ Classes:
     Display
 """
 
+import time
+from contextlib import AbstractContextManager, nullcontext
+
+import numpy as np
 import pygame
-from pygame import Vector3, Vector2, draw
+from pygame import Rect, Vector3, Vector2, draw
 from pygame.surface import Surface
 
-from config import Color
+from config import (Color, UI_FONT, UI_FONT_SIZE, UI_TEXT_CACHE_SIZE, CLIP_MARGIN,
+                    POINT_CLOUD_FRAME_BUDGET, PROGRESSIVE_BATCH_SHAPES, PROGRESSIVE_REGION_SIZE)
 from world import World
 from shape import Shape
+from camera import Camera
+from clipping import clip_segments
+from buffers import reserve
+from rasterizer import Rasterizer, AalineRasterizer, PixelRasterizer, TiledRasterizer
+from viewport import Viewport
 
 __author__ = "Jye-Ming Serres"
 
 
+# Rasterizers to cycle through
+RASTERIZERS = (AalineRasterizer, PixelRasterizer, TiledRasterizer)
+
+
 class Display:
     """Manages everything related to the final display. Acts as the view of the program.
 
+    Attributes:
+        hidden_lines (`bool`): Whether edges hidden behind their own shape are left out. Only 
+            edges belonging to at least one face turned towards the camera are drawn.
+        rasterizer (:obj:`Rasterizer`): Draws the projected edges of every shape.
+        show_ui (`bool`): Whether the UI is drawn on top of the views.
+        drawn_shapes (`int`): Number of shapes drawn in the last frame, once per viewport.
+        culled_shapes (`int`): Number of shapes left out of the last frame because they are not
+            entirely in front of the camera, once per viewport.
+        drawn_edges (`int`): Number of edges drawn in the last frame.
+        rejected_edges (`int`): Number of edges entirely outside of their viewport, left out of the
+            last frame by clipping.
+        telemetry (:obj:`Telemetry`): Times the stages of each frame, if not `None`.
+        frame_budget (`float`): Time (seconds) a frame may take to draw the world, `None` to always
+            bring every shape up to date. When the budget runs out, the remaining shapes that moved
+            keep their last drawn image and are brought up to date in the following frames. The
+            shapes are then kept drawn on a layer per viewport, only those that moved are drawn
+            again.
+        deferred_shapes (`int`): Number of shapes left with an outdated image in the last frame.
+        resolution_scaler (:obj:`ResolutionScaler`): Lowers the resolution the world is drawn at
+            when frames take too long, if not `None`. The world is then drawn on an off-screen
+            surface and stretched to the screen, while the UI stays at the native resolution.
+
     Methods:
         draw()
+        cycle_rasterizer()
+        add_viewport()
     """
 
-    def __init__(self, screen: Surface) -> None:
+    def __init__(self, screen: Surface, rasterizer: Rasterizer = None,
+                 font: pygame.font.Font = None) -> None:
         """Creates and instance from a surface.
 
         Args:
             screen: The surface to draw on.
+            rasterizer: Draws the projected edges. Defaults to `pygame.draw.aaline` calls.
+            font: Font of the UI. Defaults to the system font `UI_FONT`.
         """
         self._screen = screen
         self._screen_center = Vector2(screen.get_width(), screen.get_height())/2
-        self._font = pygame.font.SysFont("Verdana", 12)
+        self._font = pygame.font.SysFont(UI_FONT, UI_FONT_SIZE) if font is None else font
         self._crosshair_size = 10
         self._background_color = Color.DEEP_SPACE
         self._ui_color = Color.WHITE
         self._ui_margin = 5
+        self.hidden_lines = False
+        self.rasterizer = AalineRasterizer() if rasterizer is None else rasterizer
+        self.show_ui = True
+        self.drawn_shapes = 0
+        self.culled_shapes = 0
+        self.drawn_edges = 0
+        self.rejected_edges = 0
+        self.telemetry = None
+        self.frame_budget = None
+        self.deferred_shapes = 0
+        self.resolution_scaler = None
+        self._scaled_views = None
+        self._composite_time = 0
+        self._shape_radii = np.empty(0)
+        self._point_budget = 0
+        self._mapped_colors = {}
+        self._text_surfaces = {}
+        # Buffers reused from frame to frame, see `reserve()`
+        self._vertex_buffer = np.empty((0, 3), dtype=np.float32)
+        self._projected_buffer = np.empty((0, 3))
+        self._screen_buffer = np.empty((0, 2))
+        self._segment_buffer = np.empty((0, 4))
+        self._clipped_buffer = np.empty((0, 4))
+        self._color_buffer = np.empty(0, dtype=np.int64)
+        self._kept_color_buffer = np.empty(0, dtype=np.int64)
+        self._viewports = []
+        self._default_viewport = None
         pygame.mouse.set_visible(False)
 
+    @property
+    def render_scale(self) -> float:
+        """Fraction of the screen's width and height the world is drawn at."""
+        return 1.0 if self.resolution_scaler is None else self.resolution_scaler.scale
+
     def draw(self, world: World, fps: float) -> None:
         """Clears the last frame and draws a new view of the simulation and the UI on top.
 
@@ -45,73 +118,588 @@ class Display:
             fps: Frames/second of the program.
         """
         self._screen.fill(self._background_color.value)
-        self._draw_world(world)
-        self._draw_ui(fps, world.camera.aperture)
+        with self._stage("world"):
+            start = time.perf_counter()
+            scale = self.render_scale
+            if scale == 1:
+                self._draw_world(world, self._get_viewports(world))
+            else:
+                surface, viewports = self._get_scaled_views(world, scale)
+                surface.fill(self._background_color.value)
+                self._draw_world(world, viewports)
+                self._stretch(surface)
+            if self.resolution_scaler is not None:
+                self.resolution_scaler.add_frame(time.perf_counter() - start)
+        if self.show_ui:
+            with self._stage("ui"):
+                self._draw_ui(fps, world.camera.aperture)
+
+    def cycle_rasterizer(self) -> None:
+        """Switches to the next available rasterizer."""
+        kind = type(self.rasterizer)
+        index = RASTERIZERS.index(kind) + 1 if kind in RASTERIZERS else 0
+        self.rasterizer.close()
+        self.rasterizer = RASTERIZERS[index % len(RASTERIZERS)]()
+
+    def add_viewport(self, camera: Camera, rect: Rect) -> None:
+        """Adds a view of the world through a camera on a region of the screen.
+
+        Without any viewport, the world camera is shown on the whole screen. Viewports are drawn in
+        the order they were added, so later ones can be placed over earlier ones (picture in
+        picture).
+
+        Args:
+            camera: The camera through which the world is seen.
+            rect: Region of the screen covered by the view.
+        """
+        self._viewports.append(Viewport(camera, self._screen, rect))
+
+    def _stage(self, name: str) -> AbstractContextManager:
+        """Times a stage of the frame with the telemetry, if any.
+
+        Args:
+            name: Name of the stage.
+
+        Returns:
+            A context manager around the stage.
+        """
+        return nullcontext() if self.telemetry is None else self.telemetry.stage(name)
+
+    def _get_viewports(self, world: World) -> list[Viewport]:
+        """Fetches the viewports to draw.
+
+        Args:
+            world: Model of the simulation.
+
+        Returns:
+            The added viewports, or a single viewport of the world camera covering the screen.
+        """
+        if self._viewports:
+            return self._viewports
+        if self._default_viewport is None or self._default_viewport.camera is not world.camera:
+            self._default_viewport = Viewport(world.camera, self._screen, self._screen.get_rect())
+        return [self._default_viewport]
 
-    def _draw_world(self, world: World) -> None:
-        """Draws a view of the simulation using the pinhole camera model. For more information:
+    def _get_scaled_views(self, world: World, scale: float) -> tuple[Surface, list[Viewport]]:
+        """Fetches the off-screen surface the world is drawn on at a lower resolution, and the
+        viewports drawing on it.
+
+        They are kept until the scale or the viewports change. Their projections are only valid at
+        their scale, so changing the scale projects every shape again.
+
+        Args:
+            world: Model of the simulation.
+            scale: Fraction of the screen's width and height the world is drawn at.
+
+        Returns:
+            The surface, and a viewport on it for each viewport to draw.
+        """
+        viewports = self._get_viewports(world)
+        views = self._scaled_views
+        if views is None or views[0] != scale or views[1] != viewports:
+            width, height = self._screen.get_size()
+            surface = Surface((round(width*scale), round(height*scale)), 0, self._screen)
+            scaled = []
+            for viewport in viewports:
+                rect = Rect(round(viewport.rect.x*scale), round(viewport.rect.y*scale),
+                            round(viewport.rect.width*scale), round(viewport.rect.height*scale))
+                scaled.append(Viewport(viewport.camera, surface,
+                                       rect.clip(surface.get_rect()), scale))
+            views = (scale, list(viewports), surface, scaled)
+            self._scaled_views = views
+        return views[2], views[3]
+
+    def _stretch(self, surface: Surface) -> None:
+        """Stretches a surface drawn at a lower resolution over the whole screen.
+
+        Args:
+            surface: The surface to stretch.
+        """
+        size = self._screen.get_size()
+        if self._screen.get_bitsize() >= 24: # smooth scaling needs 24 or 32 bits per pixel
+            pygame.transform.smoothscale(surface, size, self._screen)
+        else:
+            pygame.transform.scale(surface, size, self._screen)
+
+    def _draw_world(self, world: World, viewports: list[Viewport]) -> None:
+        """Draws the views of the simulation using the pinhole camera model. For more information:
             https://en.wikipedia.org/wiki/Pinhole_camera_model
 
         Args:
             world: Model of the simulation.
+            viewports: The viewports to draw.
         """
-        camera = world.camera
+        start = time.perf_counter()
         shapes = world.shapes
 
-        # Sort shapes by the distance of their center to the image plane. We make sure to draw 
-        # shapes that are closer on top of shapes that are further.
+        # Projections are reused as long as neither the camera nor the shape moved. The shapes
+        # that need to be projected again are gathered for every viewport first so that they are
+        # all projected together.
+
+        with self._stage("sort"):
+            stale = []
+            for viewport in viewports:
+                if self.frame_budget is None:
+                    viewport.shape_layer = None
+                else:
+                    self._get_shape_layer(viewport, len(shapes))
+                self._sort_shapes(world, viewport)
+                camera = viewport.camera
+                camera_key = (camera, camera.pose_version, self.hidden_lines)
+                cache = viewport.projection_cache
+                stale_keys = {}
+                for index in viewport.draw_order:
+                    shape = shapes[index]
+                    key = (camera_key, shape.transform_version)
+                    cached = cache.get(shape)
+                    if cached is None or cached[0] != key:
+                        stale_keys[index] = key
+                stale.append(stale_keys)
+
+        self.drawn_shapes = 0
+        self.culled_shapes = 0
+        self.drawn_edges = 0
+        self.rejected_edges = 0
+        self._point_budget = POINT_CLOUD_FRAME_BUDGET
+        if self.frame_budget is not None:
+            # Showing the layers is expected to take as long as it did in the last frame.
+            deadline = start + self.frame_budget - self._composite_time
+            self._draw_shapes_within(shapes, viewports, stale, deadline)
+            composite_start = time.perf_counter()
+            with self._stage("raster"):
+                for viewport in viewports:
+                    self._draw_background(world, viewport)
+                    viewport.surface.blit(viewport.shape_layer[1], (0, 0))
+            self._composite_time = time.perf_counter() - composite_start
+            return
+
+        with self._stage("project"):
+            self._project_shapes(shapes, viewports, stale)
+            self.deferred_shapes = 0
+
+        # The segments of every shape are clipped to the viewport and drawn in a single batch by
+        # the rasterizer.
+
+        with self._stage("raster"):
+            for viewport in viewports:
+                self._draw_background(world, viewport)
+                cache = viewport.projection_cache
+                segments = []
+                colors = []
+                for index in viewport.draw_order:
+                    cached = cache[shapes[index]]
+                    if cached[1] is None:
+                        self.culled_shapes += 1
+                    else:
+                        segments.append(cached[1])
+                        colors.append(cached[2])
+                self.drawn_shapes += len(segments)
+                if segments:
+                    self._rasterize(viewport.surface, segments, colors)
+
+    def _draw_background(self, world: World, viewport: Viewport) -> None:
+        """Clears a viewport and draws the point clouds it sees.
+
+        Args:
+            world: Model of the simulation.
+            viewport: The viewport to clear.
+        """
+        if viewport.rect != viewport.surface.get_parent().get_rect():
+            viewport.surface.fill(self._background_color.value)
+        if world.point_clouds:
+            self._draw_point_clouds(world, viewport)
+
+    def _rasterize(self, surface: Surface, segments: list[np.ndarray],
+                   colors: list[np.ndarray]) -> None:
+        """Clips segments to a surface and draws them in a single batch with the rasterizer.
+
+        Edges entirely off the surface are dropped, and the ones going far off it (like those of
+        vertices close to the image plane) are trimmed.
+
+        Args:
+            surface: The surface to draw on, the size of the viewport.
+            segments: Viewport coordinates (x0, y0, x1, y1) of the edges of each shape.
+            colors: Mapped color of the edges of each shape.
+        """
+        count = sum(len(shape_segments) for shape_segments in segments)
+        self._segment_buffer = reserve(self._segment_buffer, count)
+        self._clipped_buffer = reserve(self._clipped_buffer, count)
+        self._color_buffer = reserve(self._color_buffer, count)
+        self._kept_color_buffer = reserve(self._kept_color_buffer, count)
+        segments = np.concatenate(segments, out=self._segment_buffer[:count])
+        colors = np.concatenate(colors, out=self._color_buffer[:count])
+        width, height = surface.get_size()
+        segments, kept = clip_segments(segments, -CLIP_MARGIN, -CLIP_MARGIN,
+                                       width - 1 + CLIP_MARGIN, height - 1 + CLIP_MARGIN,
+                                       self._clipped_buffer)
+        if len(segments) < len(kept):
+            colors = np.take(colors, np.flatnonzero(kept),
+                             out=self._kept_color_buffer[:len(segments)])
+        self.rejected_edges += len(kept) - len(segments)
+        self.drawn_edges += len(segments)
+        self.rasterizer.draw_segments(surface, segments, colors)
+
+    def _sort_shapes(self, world: World, viewport: Viewport) -> None:
+        """Sorts shapes by the distance of their center to the image plane of a viewport's camera.
+
+        We make sure to draw shapes that are closer on top of shapes that are further. The order
+        only changes when the camera or a shape moves.
 
-        def center_to_plane_dist(shape: Shape):
-            return (shape.center - camera.aperture).dot(camera.orientation)
-        shapes.sort(key=center_to_plane_dist, reverse=True)
+        Args:
+            world: Model of the simulation.
+            viewport: The viewport whose draw order is updated.
+        """
+        camera = viewport.camera
+        order_key = (camera.pose_version, world.transform_version, len(world.shapes))
+        if order_key != viewport.draw_order_key:
+            view_matrix = camera.view_matrix
+            center_dists = world.centers @ view_matrix[2, :3] + view_matrix[2, 3]
+            viewport.center_depths = center_dists
+            viewport.draw_order = np.argsort(-center_dists, kind="stable").tolist()
+            viewport.draw_order_key = order_key
 
-        for shape in shapes:
-            vertices_screen = []
-            within_frame = True
+    def _get_shape_layer(self, viewport: Viewport, shape_count: int) -> tuple:
+        """Fetches the surface the shapes of a viewport are kept drawn on within a frame budget.
 
-            for vertex in shape.vertices:
+        A new layer starts empty, and the projections cached so far are dropped so that every
+        shape is drawn on it again.
 
-                # We find the vertex's distance to the image plane with its orthogonal projection
-                # onto the camera's orientation. Since the orientation vector is normalized,
-                # the projection can be simplified to a dot product and the vector part is ommited.
+        Args:
+            viewport: The viewport the layer belongs to.
+            shape_count: Number of shapes in the world.
 
-                vrtx_rel = vertex - camera.aperture
-                vrtx_dist = vrtx_rel.dot(camera.orientation)
+        Returns:
+            The layer, see `Viewport.shape_layer`.
+        """
+        key = (shape_count, type(self.rasterizer))
+        layer = viewport.shape_layer
+        if layer is None or layer[0] != key:
+            if layer is None:
+                surface = Surface(viewport.rect.size, 0, self._screen)
+                scratch = Surface(viewport.rect.size, 0, self._screen)
+            else:
+                surface, scratch = layer[1], layer[3]
+            surface.fill(self._background_color.value)
+            surface.set_colorkey(self._background_color.value) # shows the point clouds behind
+            layer = (key, surface, np.zeros((shape_count, 4), dtype=np.intp), scratch)
+            viewport.shape_layer = layer
+            viewport.projection_cache.clear()
+        return layer
+
+    def _draw_shapes_within(self, shapes: list[Shape], viewports: list[Viewport],
+                            stale: list[dict[int, tuple]], deadline: float) -> None:
+        """Projects and draws shapes from the most to the least visible until a deadline, at least
+        one batch.
+
+        The nearest and largest shapes on screen (the largest ratio of their radius to the depth
+        of their center) go first, `PROGRESSIVE_BATCH_SHAPES` per viewport at a time. Shapes are
+        drawn on the layers of the viewports, which keep the last drawn image of the shapes left
+        out. These remain out of date for the next frame.
 
-                if vrtx_dist > 0: # vertex needs to be strictly in front of the aperture
+        Args:
+            shapes: Shapes of the world.
+            viewports: Every viewport drawn this frame.
+            stale: For each viewport, the index of the shapes to project and their cache key.
+            deadline: `time.perf_counter()` value after which no batch is started.
+        """
+        if len(self._shape_radii) != len(shapes):
+            self._shape_radii = np.array([shape.mesh.radius for shape in shapes], dtype=float)
+        queues = []
+        for viewport, stale_keys in zip(viewports, stale):
+            indices = np.fromiter(stale_keys, dtype=np.intp, count=len(stale_keys))
+            radii = self._shape_radii[indices]
+            depths = viewport.center_depths[indices]
+            priorities = np.where(depths > 0, radii/np.maximum(depths, 1e-9), -np.inf)
+            queues.append(indices[np.argsort(-priorities, kind="stable")].tolist())
+
+        position = 0
+        while any(position < len(queue) for queue in queues):
+            batch = [{index: stale_keys[index]
+                      for index in queue[position:position + PROGRESSIVE_BATCH_SHAPES]}
+                     for queue, stale_keys in zip(queues, stale)]
+            with self._stage("project"):
+                self._project_shapes(shapes, viewports, batch)
+            with self._stage("raster"):
+                for viewport, batch_keys in zip(viewports, batch):
+                    if batch_keys:
+                        self._redraw_shapes(shapes, viewport, list(batch_keys))
+            position += PROGRESSIVE_BATCH_SHAPES
+            if time.perf_counter() >= deadline:
+                break
+        self.deferred_shapes = sum(max(len(queue) - position, 0) for queue in queues)
+
+    def _redraw_shapes(self, shapes: list[Shape], viewport: Viewport, indices: list[int]) -> None:
+        """Replaces the image of shapes on the layer of a viewport by their cached projection.
+
+        The boxes of pixels the shapes covered and now cover are drawn again, widened to cells of
+        `PROGRESSIVE_REGION_SIZE` pixels. Every shape crossing these cells is drawn on a scratch
+        surface in draw order, nearest on top, and the cells are copied from it onto the layer. The
+        cells then hold the same pixels as if every shape had been drawn. The other shapes on the
+        layer are always drawn from their cached projection, so this does not bring them up to
+        date.
 
-                    # We scale the vertex' coordinates based its distance to the image plane
-                    # according to the pinhole camera model. We calculate the vertex's (x, y)
-                    # position on the image plane relative to the image center with two orthogonal
-                    # projections (refer to the previous paragraph for why a simple dot product is
-                    # used). Finally, we convert (x, y) to coordinates matching pygame's interface.
+        Args:
+            shapes: Shapes of the world.
+            viewport: The viewport whose layer is drawn on.
+            indices: Index of the shapes to draw again.
+        """
+        _, layer, boxes, scratch = viewport.shape_layer
+        cache = viewport.projection_cache
+        old_boxes = boxes[indices]
+        boxes[indices] = 0
+        drawn = []
+        for index in indices:
+            if cache[shapes[index]][1] is None:
+                self.culled_shapes += 1
+            elif len(cache[shapes[index]][1]):
+                drawn.append(index)
+        self.drawn_shapes += len(drawn)
+        if drawn:
+            boxes[drawn] = self._shape_boxes([cache[shapes[index]][1] for index in drawn],
+                                             layer.get_size())
+        changed = np.concatenate((old_boxes, boxes[indices]))
+        changed = changed[(changed[:, 0] < changed[:, 2]) & (changed[:, 1] < changed[:, 3])]
+        if len(changed) == 0:
+            return
+
+        # Cells to draw again, padded with a row above and a column on each side. Their cumulative
+        # sums count the cells to draw again within the cells covered by any box at once.
+
+        size = PROGRESSIVE_REGION_SIZE
+        width, height = layer.get_size()
+        dirty = np.zeros((-(-height//size) + 1, -(-width//size) + 2), dtype=bool)
+        changed[:, 2:] -= 1 # last pixel of each box
+        for x0, y0, x1, y1 in (changed//size).tolist():
+            dirty[y0 + 1:y1 + 2, x0 + 1:x1 + 2] = True
+        counts = dirty.cumsum(axis=0).cumsum(axis=1)
+        kept = (boxes[:, 0] < boxes[:, 2]) & (boxes[:, 1] < boxes[:, 3])
+        left, top, right, bottom = ((boxes - (0, 0, 1, 1))//size*kept[:, None] + (0, 0, 1, 1)).T
+        crossing = kept & (counts[bottom, right] - counts[top, right] - counts[bottom, left]
+                           + counts[top, left] > 0)
+
+        runs = []
+        for row, row_cells in enumerate(dirty[1:]):
+            edges = np.flatnonzero(row_cells[1:] != row_cells[:-1]).tolist()
+            runs.extend(Rect(first*size, row*size, (last - first)*size, size).clip(layer.get_rect())
+                        for first, last in zip(edges[::2], edges[1::2]))
+        for rect in runs:
+            scratch.fill(self._background_color.value, rect)
+        order = [index for index in viewport.draw_order if crossing[index]]
+        if order:
+            self._rasterize(scratch, [cache[shapes[index]][1] for index in order],
+                            [cache[shapes[index]][2] for index in order])
+        layer.blits([(scratch, rect, rect) for rect in runs], doreturn=False)
+
+    @staticmethod
+    def _shape_boxes(segments: list[np.ndarray], size: tuple[int, int]) -> np.ndarray:
+        """Computes the boxes of pixels covered by the edges of shapes on a layer.
+
+        A box covers the edges of a shape, rounded outwards with a margin for antialiasing, within
+        the layer.
 
-                    vrtx_rel_scaled = vrtx_rel*camera.focal_length/vrtx_dist
-                    vrtx_x = vrtx_rel_scaled.dot(camera.image_x)
-                    vrtx_y = vrtx_rel_scaled.dot(camera.image_y)
-                    vrtx_screen = Vector2(vrtx_x, -vrtx_y) + self._screen_center
+        Args:
+            segments: Viewport coordinates (x0, y0, x1, y1) of the edges of each shape, at least
+                one edge per shape.
+            size: Width and height of the layer.
 
-                    vertices_screen.append(vrtx_screen)
-                else:
-                    within_frame = False
-                    break
+        Returns:
+            Left, top, right and bottom (exclusive) of the box of each shape. Shape (s, 4).
+        """
+        counts = [len(shape_segments) for shape_segments in segments]
+        starts = np.cumsum([0] + counts[:-1])
+        segments = np.concatenate(segments)
+        xs = segments[:, 0::2]
+        ys = segments[:, 1::2]
+        width, height = size
+        boxes = np.stack((np.minimum.reduceat(xs.min(axis=1), starts) - 2,
+                          np.minimum.reduceat(ys.min(axis=1), starts) - 2,
+                          np.maximum.reduceat(xs.max(axis=1), starts) + 3,
+                          np.maximum.reduceat(ys.max(axis=1), starts) + 3), axis=1)
+        np.clip(boxes, 0, (width, height, width, height), out=boxes)
+        return np.floor(boxes)
+
+    def _project_shapes(self, shapes: list[Shape], viewports: list[Viewport],
+                        stale: list[dict[int, tuple]]) -> None:
+        """Projects the edges of shapes onto viewports and caches them.
+
+        World space vertices do not depend on the camera. They are gathered once for all viewports,
+        then projected through every camera at once.
 
-            if within_frame:
-                for edge in shape.edges:
-                    draw.aaline(self._screen, shape.color.value,
-                        vertices_screen[edge[0]], vertices_screen[edge[1]])
+        Args:
+            shapes: Shapes of the world.
+            viewports: Every viewport drawn this frame.
+            stale: For each viewport, the index of the shapes to project and their cache key.
+        """
+        indices = sorted(set().union(*stale))
+        if not indices:
+            return
+        vertex_arrays = [shapes[index].vertices for index in indices]
+        counts = [len(vertices) for vertices in vertex_arrays]
+        offsets = dict(zip(indices, np.cumsum([0] + counts[:-1]).tolist()))
+        total = sum(counts)
+        self._vertex_buffer = reserve(self._vertex_buffer, total)
+        vertices = np.concatenate(vertex_arrays, out=self._vertex_buffer[:total])
+
+        # The camera's view matrix combines the three orthogonal projections of the pinhole camera
+        # model (onto `image_x`, `image_y` and `orientation`) so that projecting all the vertices
+        # is a single matrix product per camera. The third coordinate is the vertex's distance to
+        # the image plane.
+
+        projecting = [i for i, stale_keys in enumerate(stale) if stale_keys]
+        view_matrices = np.stack([viewports[i].camera.view_matrix for i in projecting])
+        rows = len(projecting)*total
+        self._projected_buffer = reserve(self._projected_buffer, rows)
+        projected = self._projected_buffer[:rows].reshape(len(projecting), total, 3)
+        np.matmul(vertices, view_matrices[:, :, :3].transpose(0, 2, 1), out=projected)
+        projected += view_matrices[:, np.newaxis, :, 3]
+
+        for projected_view, i in zip(projected, projecting):
+            viewport = viewports[i]
+            cache = viewport.projection_cache
+            for index, key in stale[i].items():
+                shape = shapes[index]
+                offset = offsets[index]
+                # The arrays of the previous projection are overwritten when their size still fits.
+                cached = cache.get(shape)
+                segments = self._shape_segments(
+                    shape, projected_view[offset:offset + len(shape.vertices)], viewport,
+                    None if cached is None else cached[1])
+                colors = None
+                if segments is not None:
+                    color = self._map_color(shape.color)
+                    colors = None if cached is None else cached[2]
+                    if colors is None or len(colors) != len(segments) or colors[0] != color:
+                        colors = np.full(len(segments), color)
+                cache[shape] = (key, segments, colors)
+
+    def _shape_segments(self, shape: Shape, projected: np.ndarray, viewport: Viewport,
+                        out: np.ndarray = None) -> np.ndarray | None:
+        """Converts the projected vertices of a shape into the segments of its edges.
+
+        Args:
+            shape: The projected shape.
+            projected: Image plane coordinates (u, v) and distance to the image plane w of each
+                vertex.
+            viewport: The viewport the shape is projected onto.
+            out: Array the segments are written into if it has the right shape, otherwise a new
+                one is allocated.
+
+        Returns:
+            The viewport coordinates (x0, y0, x1, y1) of each edge to draw, or `None` if the shape
+            is not entirely in front of the camera.
+        """
+        depths = projected[:, 2]
+        if not (depths > 0).all(): # vertices need to be strictly in front of the aperture
+            return None
+
+        # We scale the (u, v) coordinates by the distance to the image plane according to the
+        # pinhole camera model, then convert them to coordinates matching pygame's interface.
+
+        self._screen_buffer = reserve(self._screen_buffer, len(projected))
+        vertices_screen = self._screen_buffer[:len(projected)]
+        np.divide(projected[:, :2], depths[:, np.newaxis], out=vertices_screen)
+        if viewport.scale != 1:
+            vertices_screen *= viewport.scale
+        vertices_screen[:, 0] += viewport.center.x
+        np.subtract(viewport.center.y, vertices_screen[:, 1], out=vertices_screen[:, 1])
+
+        edges = shape.edges
+        if self.hidden_lines:
+            edges = edges[shape.front_edges(viewport.camera.aperture)]
+        if out is None or len(out) != len(edges):
+            out = np.empty((len(edges), 4))
+        # Gathering both ends of every edge at once gives rows (x0, y0, x1, y1).
+        np.take(vertices_screen, edges, axis=0, out=out.reshape(-1, 2, 2), mode="clip")
+        return out
+
+    def _draw_point_clouds(self, world: World, viewport: Viewport) -> None:
+        """Refines the point clouds seen by a viewport, then shows them behind the shapes.
+
+        Point clouds are drawn on a layer kept between frames. While the camera stays still, every
+        frame adds the next passes of each point cloud to the layer, as long as the frame's budget
+        of points allows it. The first frame after the camera moves starts over with a coarse
+        subsample.
+
+        Args:
+            world: Model of the simulation.
+            viewport: The viewport to draw on.
+        """
+        camera = viewport.camera
+        key = (camera, camera.pose_version, len(world.point_clouds))
+        layer = viewport.point_cloud_layer
+        if layer is None or layer[0] != key:
+            surface = Surface(viewport.rect.size, 0, self._screen) if layer is None else layer[1]
+            surface.fill(self._background_color.value)
+            layer = (key, surface, [0]*len(world.point_clouds))
+            viewport.point_cloud_layer = layer
+        _, surface, next_passes = layer
+
+        view_matrix = camera.view_matrix
+        for i, point_cloud in enumerate(world.point_clouds):
+            color = self._map_color(point_cloud.color)
+            while (next_passes[i] < point_cloud.pass_count
+                   and self._point_budget >= point_cloud.pass_size):
+                points = point_cloud.get_pass(next_passes[i])
+                self._plot_points(surface, points, view_matrix, viewport, color)
+                self._point_budget -= len(points)
+                next_passes[i] += 1
+        viewport.surface.blit(surface, (0, 0))
+
+    @staticmethod
+    def _plot_points(surface: Surface, points: np.ndarray, view_matrix: np.ndarray,
+                     viewport: Viewport, color: int) -> None:
+        """Projects points through the pinhole camera model and writes them into a surface.
+
+        Args:
+            surface: The surface to draw on, the size of the viewport.
+            points: Coordinates of each point in world space. Shape (k, 3).
+            view_matrix: View matrix of the camera.
+            viewport: The viewport the points are projected onto.
+            color: Color of the points, mapped to the surface's pixel format.
+        """
+        projected = points @ view_matrix[:, :3].T + view_matrix[:, 3]
+        projected = projected[projected[:, 2] > 0] # strictly in front of the aperture
+        depths = projected[:, 2]/viewport.scale
+        xs = np.rint(viewport.center.x + projected[:, 0]/depths).astype(np.intp)
+        ys = np.rint(viewport.center.y - projected[:, 1]/depths).astype(np.intp)
+        width, height = surface.get_size()
+        inside = (xs >= 0) & (xs < width) & (ys >= 0) & (ys < height)
+        pixels = pygame.surfarray.pixels2d(surface)
+        try:
+            pixels[xs[inside], ys[inside]] = color
+        finally:
+            del pixels # unlocks the surface
+
+    def _map_color(self, color: Color) -> int:
+        """Maps a color to the screen's pixel format.
+
+        Args:
+            color: The color to map.
+
+        Returns:
+            The mapped color.
+        """
+        mapped = self._mapped_colors.get(color)
+        if mapped is None:
+            mapped = self._screen.map_rgb(color.value)
+            self._mapped_colors[color] = mapped
+        return mapped
 
     def _draw_ui(self, fps: float, camera_pos: Vector3) -> None:
-        """Draws the keyboard controls, the position of the end user, the fps of the program and a 
-            crosshair.
+        """Draws the keyboard controls, the position of the end user, the fps of the program, a 
+            crosshair and the borders of the viewports.
 
         Args:
             fps: Frames/second of the program.
             camera_pos: Current (x, y, z) position of the end user (camera).
         """
-        # draw crosshair
-        x = self._screen_center.x
-        y = self._screen_center.y
+        # draw viewport borders
+        for viewport in self._viewports:
+            if viewport.rect != self._screen.get_rect():
+                draw.rect(self._screen, self._ui_color.value, viewport.rect, width=1)
+
+        # draw crosshair at the center of the main view
+        x, y = self._viewports[0].rect.center if self._viewports else self._screen_center
         offset = self._crosshair_size/2
         draw.line(self._screen, self._ui_color.value, (x - offset, y), (x + offset, y))
         draw.line(self._screen, self._ui_color.value, (x, y - offset), (x, y + offset))
@@ -123,14 +711,27 @@ class Display:
             [S] backward
             [D] right
             [LSHIFT] down
-            [SPACE] up"""
-        str_fps = f"FPS: {round(fps, 1)}"
+            [SPACE] up
+            [H] hidden lines
+            [R] rasterizer
+            [B] frame budget
+            [V] resolution scaling"""
+        budget = "off"
+        if self.frame_budget is not None:
+            budget = f"{self.frame_budget*1000:.1f} ms, {self.deferred_shapes} shapes deferred"
+        scaling = "off" if self.resolution_scaler is None else "auto"
+        str_stats = f"""FPS: {round(fps, 1)}
+            Rasterizer: {self.rasterizer.name}
+            Off-screen edges: {self.rejected_edges}
+            Frame budget: {budget}
+            Render scale: {self.render_scale:.0%} ({scaling})"""
         str_pos = f"({camera_pos.x:.1f}, {camera_pos.y:.1f}, {camera_pos.z:.1f})"
 
         height = self._screen.get_height()
         width = self._screen.get_width()
         self._blit_lines(str_controls, (self._ui_margin, self._ui_margin), line_spacing=2)
-        self._blit_line(str_fps, (self._ui_margin, height - self._ui_margin), b_just=True)
+        self._blit_lines(str_stats, (self._ui_margin, height - self._ui_margin), b_just=True,
+                         line_spacing=2)
         self._blit_line(str_pos, (width - self._ui_margin, self._ui_margin), r_just=True)
 
     def _blit_line(
@@ -147,7 +748,7 @@ class Display:
             r_just: Whether the line should justify on its right.
             b_just: Whether the line should justify on its bottom.
         """
-        surface = self._font.render(string.strip(), True, self._ui_color.value)
+        surface = self._render_text(string.strip())
         x = coord[0] - (surface.get_width() if r_just else 0)
         y = coord[1] - (surface.get_height() if b_just else 0)
         self._screen.blit(surface, (x, y))
@@ -173,7 +774,7 @@ class Display:
         total_offset = 0
         blits = []
         for line in lines:
-            surface = self._font.render(line.strip(), True, self._ui_color.value)
+            surface = self._render_text(line.strip())
             x = coord[0] - (surface.get_width() if r_just else 0)
             y = coord[1] - (surface.get_height() if b_just else 0) + total_offset
             blits.append((surface, (x, y)))
@@ -181,3 +782,23 @@ class Display:
             total_offset += -offset if b_just else offset
 
         self._screen.blits(blit_sequence=blits, doreturn=0)
+
+    def _render_text(self, line: str) -> Surface:
+        """Renders a line of text, or reuses its surface if it was rendered recently.
+
+        Most lines of the UI are the same from one frame to the next. Rendered lines are kept
+        until `UI_TEXT_CACHE_SIZE` lines are, then all of them are dropped.
+
+        Args:
+            line: The text to render.
+
+        Returns:
+            The rendered text.
+        """
+        surface = self._text_surfaces.get(line)
+        if surface is None:
+            if len(self._text_surfaces) >= UI_TEXT_CACHE_SIZE:
+                self._text_surfaces.clear()
+            surface = self._font.render(line, True, self._ui_color.value)
+            self._text_surfaces[line] = surface
+        return surface
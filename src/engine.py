@@ -4,12 +4,17 @@ Classes:
     Engine
 """
 
+from contextlib import AbstractContextManager, nullcontext
+
 import pygame
 from pygame.time import Clock
 
 from camera_controller import CameraController, CamEvent
+from config import TARGET_FRAME_RATE
 from world import World
 from display import Display
+from resolution import ResolutionScaler
+from telemetry import Telemetry
 
 __author__ = "Jye-Ming Serres"
 
@@ -22,29 +27,40 @@ class Engine:
         world (:obj:`World`): Acts as the model of the simulation.
         display (:obj:`Display`): Manages the view of the simulation and the UI.
         clock (:obj:`pygame.time.Clock`): Tracks time elapsed and main loop frequency.
+        telemetry (:obj:`Telemetry`): Records the stages and metrics of every frame, if not
+            `None`.
 
     Methods:
         handle_events()
         update_world()
         render()
+        step()
     """
 
-    def __init__(self, world: World, display: Display, clock: Clock) -> None:
+    def __init__(self, world: World, display: Display, clock: Clock,
+                 telemetry: Telemetry = None) -> None:
         """Creates an instance with passed world, display and clock.
 
         Args:
             world: Acts as the model of the simulation.
             display: Manages the view of the simulation and the UI.
             clock: Tracks time elapsed and main loop frequency.
+            telemetry: Records the stages and metrics of every frame. Shared with the display.
         """
         self.running = True
         self.world = world
         self.display = display
         self.clock = clock
+        self.telemetry = telemetry
+        self.display.telemetry = telemetry
         self._cam_control = CameraController(self.world.camera)
 
     def handle_events(self) -> None:
         """Handles pygame's event loop and other user inputs through pygame."""
+        with self._stage("events"):
+            self._handle_events()
+
+    def _handle_events(self) -> None:
         for event in pygame.event.get():
             match event.type:
                 case pygame.QUIT:
@@ -58,6 +74,10 @@ class Engine:
                         case pygame.K_w: self._cam_control.translate_event(CamEvent.FORWARD_SHIFT)
                         case pygame.K_SPACE: self._cam_control.translate_event(CamEvent.UP_SHIFT)
                         case pygame.K_LSHIFT: self._cam_control.translate_event(CamEvent.DOWN_SHIFT)
+                        case pygame.K_h: self.display.hidden_lines = not self.display.hidden_lines
+                        case pygame.K_r: self.display.cycle_rasterizer()
+                        case pygame.K_b: self._toggle_frame_budget()
+                        case pygame.K_v: self._toggle_resolution_scaling()
                 case pygame.KEYUP:
                     match event.key:
                         case pygame.K_a: self._cam_control.translate_event(CamEvent.RIGHT_SHIFT)
@@ -68,19 +88,88 @@ class Engine:
                         case pygame.K_LSHIFT: self._cam_control.translate_event(CamEvent.UP_SHIFT)
         self._cam_control.rotate_event(pygame.mouse.get_rel())
 
+    def _toggle_frame_budget(self) -> None:
+        """Switches the display between drawing every frame entirely and within the time of a
+        frame at the target frame rate."""
+        if self.display.frame_budget is None:
+            self.display.frame_budget = 1/TARGET_FRAME_RATE
+        else:
+            self.display.frame_budget = None
+
+    def _toggle_resolution_scaling(self) -> None:
+        """Switches the display between drawing the world at the native resolution and at a
+        resolution lowered as needed to draw it within the time of a frame at the target frame
+        rate."""
+        if self.display.resolution_scaler is None:
+            self.display.resolution_scaler = ResolutionScaler(1/TARGET_FRAME_RATE)
+        else:
+            self.display.resolution_scaler = None
+
     def update_world(self) -> None:
         """Steps the simulation proportionally to real time elapsed.
 
         Ideally called after handle_events().
         """
-        self._cam_control.update()
-        dt = self.clock.get_time() / 1000
-        self.world.update(dt)
+        with self._stage("update"):
+            self._cam_control.update()
+            dt = self.clock.get_time() / 1000
+            self.world.update(dt)
 
     def render(self) -> None:
         """Draws the simulation view and the UI then renders them on the screen.
 
         Should be called after update_world().
         """
-        self.display.draw(self.world, self.clock.get_fps())
-        pygame.display.flip()
+        fps = self.clock.get_fps()
+        with self._stage("draw"):
+            self.display.draw(self.world, fps)
+        with self._stage("flip"):
+            pygame.display.flip()
+        self._end_frame(fps)
+
+    def step(self, dt: float, fps: float) -> None:
+        """Steps the simulation by a fixed time interval and draws it, without user inputs nor 
+        flipping the display. Used to render headless.
+
+        Args:
+            dt: Delta time (seconds).
+            fps: Frames/second shown on the UI.
+        """
+        with self._stage("update"):
+            self.world.update(dt)
+        with self._stage("draw"):
+            self.display.draw(self.world, fps)
+        self._end_frame(fps)
+
+    def _stage(self, name: str) -> AbstractContextManager:
+        """Times a stage of the frame with the telemetry, if any.
+
+        Args:
+            name: Name of the stage.
+
+        Returns:
+            A context manager around the stage.
+        """
+        return nullcontext() if self.telemetry is None else self.telemetry.stage(name)
+
+    def _end_frame(self, fps: float) -> None:
+        """Records the metrics of the frame just drawn with the telemetry, if any.
+
+        Args:
+            fps: Frames/second shown on the UI.
+        """
+        if self.telemetry is None:
+            return
+        display = self.display
+        camera = self.world.camera
+        collisions = self.world.collisions
+        self.telemetry.end_frame(fps=fps, drawn_shapes=display.drawn_shapes,
+                                 culled_shapes=display.culled_shapes,
+                                 deferred_shapes=display.deferred_shapes,
+                                 drawn_edges=display.drawn_edges,
+                                 rejected_edges=display.rejected_edges,
+                                 render_scale=display.render_scale,
+                                 collision_pairs=0 if collisions is None else len(collisions.pairs),
+                                 camera_x=camera.aperture.x, camera_y=camera.aperture.y,
+                                 camera_z=camera.aperture.z,
+                                 camera_pose_version=camera.pose_version)
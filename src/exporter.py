@@ -0,0 +1,203 @@
+"""Export rendered frames to files or to a video encoder without stalling rendering.
+
+Classes:
+    FrameSink
+    PngSequenceSink
+    RawVideoSink
+    FrameExporter
+
+Functions:
+    export_frames()
+"""
+
+import os
+import queue
+import shlex
+import subprocess
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+
+import pygame
+from pygame.surface import Surface
+
+from camera_path import CameraPath
+from engine import Engine
+
+__author__ = "Jye-Ming Serres"
+
+
+class FrameSink(ABC):
+    """Abstract class. Receives frames, in order, from the writer thread of `FrameExporter`.
+
+    Methods:
+        write()
+        close()
+    """
+
+    @abstractmethod
+    def write(self, index: int, frame: bytes, size: tuple[int, int]) -> None:
+        """Stores or forwards a frame.
+
+        Args:
+            index: Number of the frame, starting at 0.
+            frame: Pixels of the frame in RGB order, row by row.
+            size: Width and height of the frame.
+        """
+        pass
+
+    def close(self) -> None:
+        """Called once after the last frame."""
+        pass
+
+
+class PngSequenceSink(FrameSink):
+    """Saves each frame as a numbered PNG file."""
+
+    def __init__(self, directory: str, pattern: str = "frame_{:05d}.png") -> None:
+        """Creates an instance writing into a directory, created if needed.
+
+        Args:
+            directory: Where the PNG files are saved.
+            pattern: File name of a frame, formatted with the frame's index.
+        """
+        os.makedirs(directory, exist_ok=True)
+        self._directory = directory
+        self._pattern = pattern
+
+    def write(self, index: int, frame: bytes, size: tuple[int, int]) -> None:
+        surface = pygame.image.frombytes(frame, size, "RGB")
+        pygame.image.save(surface, os.path.join(self._directory, self._pattern.format(index)))
+
+
+class RawVideoSink(FrameSink):
+    """Streams raw RGB frames to the standard input of a command, or to the standard output.
+
+    For instance, with `ffmpeg -f rawvideo -pix_fmt rgb24 -s 960x720 -r 60 -i - flythrough.mp4`.
+    """
+
+    def __init__(self, command: str = "-") -> None:
+        """Creates an instance streaming to a command.
+
+        Args:
+            command: Shell-like command line of the encoder, or "-" for the standard output.
+        """
+        self._process = None
+        if command == "-":
+            self._pipe = sys.stdout.buffer
+        else:
+            self._process = subprocess.Popen(shlex.split(command), stdin=subprocess.PIPE)
+            self._pipe = self._process.stdin
+
+    def write(self, index: int, frame: bytes, size: tuple[int, int]) -> None:
+        self._pipe.write(frame)
+
+    def close(self) -> None:
+        self._pipe.flush()
+        if self._process is not None:
+            self._pipe.close()
+            self._process.wait()
+
+
+class FrameExporter:
+    """Copies frames from a surface and hands them to a background writer thread.
+
+    Frames go through a bounded queue. Rendering only waits on the writer when the queue is full,
+    which bounds memory when the sink is slower than rendering.
+
+    Methods:
+        submit()
+        close()
+    """
+
+    def __init__(self, surface: Surface, sink: FrameSink, queue_size: int = 32) -> None:
+        """Creates an instance and starts its writer thread.
+
+        Args:
+            surface: The surface frames are copied from.
+            sink: Where the writer thread sends frames.
+            queue_size: Maximum number of frames waiting to be written.
+        """
+        self._surface = surface
+        self._sink = sink
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._frame_count = 0
+        self._stall_time = 0
+        self._error = None
+        self._writer = threading.Thread(target=self._write_frames, name="frame-writer",
+                                        daemon=True)
+        self._writer.start()
+
+    @property
+    def frame_count(self) -> int:
+        """Number of frames submitted so far."""
+        return self._frame_count
+
+    @property
+    def stall_time(self) -> float:
+        """Total time (seconds) rendering waited for room in the queue."""
+        return self._stall_time
+
+    def submit(self) -> None:
+        """Copies the surface's current content and queues it for writing.
+
+        Raises:
+            RuntimeError: If the writer thread failed.
+        """
+        if self._error is not None:
+            raise RuntimeError("The frame writer failed") from self._error
+        frame = pygame.image.tobytes(self._surface, "RGB")
+        item = (self._frame_count, frame, self._surface.get_size())
+        try:
+            self._queue.put_nowait(item)
+        except queue.Full:
+            start = time.perf_counter()
+            self._queue.put(item)
+            self._stall_time += time.perf_counter() - start
+        self._frame_count += 1
+
+    def close(self) -> None:
+        """Waits for every queued frame to be written, then closes the sink."""
+        self._queue.put(None)
+        self._writer.join()
+        self._sink.close()
+        if self._error is not None:
+            raise RuntimeError("The frame writer failed") from self._error
+
+    def _write_frames(self) -> None:
+        """Body of the writer thread. Writes frames until it receives `None`."""
+        while (item := self._queue.get()) is not None:
+            if self._error is None:
+                try:
+                    self._sink.write(*item)
+                except Exception as error: # pylint: disable=broad-exception-caught
+                    self._error = error
+
+
+def export_frames(engine: Engine, camera_path: CameraPath, frame_rate: float,
+                  exporter: FrameExporter) -> float:
+    """Renders the simulation headless along a camera path and exports every frame.
+
+    The simulation is stepped by a fixed interval per frame regardless of how long rendering and
+    encoding take.
+
+    Args:
+        engine: Engine whose display draws on the exporter's surface.
+        camera_path: Where the camera is at each frame.
+        frame_rate: Frames per second of the exported sequence.
+        exporter: Receives every rendered frame. Closed when done.
+
+    Returns:
+        Sustained export throughput in frames/second, from the first frame until the last one is
+        written.
+    """
+    dt = 1/frame_rate
+    frame_count = int(camera_path.duration*frame_rate) + 1
+    start = time.perf_counter()
+    for i in range(frame_count):
+        camera_path.apply(engine.world.camera, i*dt)
+        engine.step(dt, frame_rate)
+        exporter.submit()
+    exporter.close()
+    return frame_count/(time.perf_counter() - start)
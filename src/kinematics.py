@@ -0,0 +1,294 @@
+"""Step the motion of many rigid bodies at once.
+
+Classes:
+    Kinematics
+
+Functions:
+    rotation_matrices()
+    orthonormalize()
+"""
+
+import numpy as np
+
+from config import SHAPE_ORTHONORMALIZE_INTERVAL
+from buffers import reserve
+
+__author__ = "Jye-Ming Serres"
+
+
+class Kinematics:
+    """Keeps the position, orientation and velocities of rigid bodies in shared arrays.
+
+    Each body is a row of the arrays. Only the rows of moving bodies (non-zero rectilinear or
+    angular velocity) are advanced by `step()`, all of them in a single batch of array operations.
+    Every time a row's transform changes, its version is incremented so that data derived from it
+    (like world space vertices) can be recomputed only when needed.
+
+    Positions are stored as float64 so that shapes far from the origin keep their precision.
+    Orientations and velocities are float32 and versions int32 to keep very large worlds compact.
+
+    Methods:
+        add()
+        set_velocities()
+        set_rows_velocities()
+        translate()
+        rotate()
+        step()
+    """
+
+    def __init__(self, capacity: int = 16) -> None:
+        """Creates an empty instance.
+
+        Args:
+            capacity: Number of rows allocated up front. The arrays grow as needed.
+        """
+        self._size = 0
+        self._positions = np.zeros((capacity, 3))
+        self._orientations = np.zeros((capacity, 3, 3), dtype=np.float32)
+        self._rectilinear_velocities = np.zeros((capacity, 3), dtype=np.float32)
+        self._angular_velocities = np.zeros((capacity, 3), dtype=np.float32)
+        self._versions = np.zeros(capacity, dtype=np.int32)
+        self._moving = np.zeros(capacity, dtype=bool)
+        self._moving_rows = np.empty(0, dtype=np.intp)
+        self._moving_rows_dirty = False
+        # Buffers reused by every step, see `reserve()`
+        self._displacements = np.empty((0, 3), dtype=np.float32)
+        self._rotations = np.empty((0, 3, 3))
+        self._rotated = np.empty((0, 3, 3))
+        self._steps_since_orthonormalization = 0
+        self._version = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def positions(self) -> np.ndarray:
+        """Position of each body's center. Shape (n, 3)."""
+        return self._positions[:self._size]
+
+    @property
+    def orientations(self) -> np.ndarray:
+        """Rotation matrix of each body, from its local space to world space. Shape (n, 3, 3)."""
+        return self._orientations[:self._size]
+
+    @property
+    def rectilinear_velocities(self) -> np.ndarray:
+        """Velocity of each body in pixels/seconds. Shape (n, 3). Read only, use
+        `set_velocities()`."""
+        return self._rectilinear_velocities[:self._size]
+
+    @property
+    def angular_velocities(self) -> np.ndarray:
+        """Counterclockwise angular velocity of each body in degrees/seconds around the x, y, z
+        axis. Shape (n, 3). Read only, use `set_velocities()`."""
+        return self._angular_velocities[:self._size]
+
+    @property
+    def versions(self) -> np.ndarray:
+        """Incremented for a row every time its position or orientation changes. Shape (n,)."""
+        return self._versions[:self._size]
+
+    @property
+    def version(self) -> int:
+        """Incremented every time any row is added or has its position or orientation changed."""
+        return self._version
+
+    @property
+    def moving_rows(self) -> np.ndarray:
+        """Indices of the rows with a non-zero rectilinear or angular velocity."""
+        if self._moving_rows_dirty:
+            self._moving_rows = np.flatnonzero(self._moving[:self._size])
+            self._moving_rows_dirty = False
+        return self._moving_rows
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes used by the rows in use. Spare capacity is not counted."""
+        arrays = (self._positions, self._orientations, self._rectilinear_velocities,
+                  self._angular_velocities, self._versions, self._moving)
+        return self._size*sum(array.itemsize*array[0].size for array in arrays)
+
+    def add(self, position, orientation=None, rectilinear_velocity=(0, 0, 0),
+            angular_velocity=(0, 0, 0), version: int = 0) -> int:
+        """Appends a body.
+
+        Args:
+            position: Position of the body's center.
+            orientation: 3x3 rotation matrix of the body. Identity if `None`.
+            rectilinear_velocity: Velocity in pixels/seconds.
+            angular_velocity: Counterclockwise angular velocity in degrees/seconds around the x, y,
+                z axis.
+            version: Initial version of the row.
+
+        Returns:
+            The row of the new body.
+        """
+        if self._size == len(self._positions):
+            self._grow()
+        row = self._size
+        self._size += 1
+        self._positions[row] = position
+        self._orientations[row] = np.identity(3) if orientation is None else orientation
+        self._versions[row] = version
+        self._version += 1
+        self.set_velocities(row, rectilinear_velocity, angular_velocity)
+        return row
+
+    def set_velocities(self, row: int, rectilinear_velocity=None, angular_velocity=None) -> None:
+        """Assigns the velocities of a body and keeps track of whether it is moving.
+
+        Args:
+            row: The body's row.
+            rectilinear_velocity: Velocity in pixels/seconds. Unchanged if `None`.
+            angular_velocity: Counterclockwise angular velocity in degrees/seconds around the x, y,
+                z axis. Unchanged if `None`.
+        """
+        if rectilinear_velocity is not None:
+            self._rectilinear_velocities[row] = rectilinear_velocity
+        if angular_velocity is not None:
+            self._angular_velocities[row] = angular_velocity
+        moving = bool(self._rectilinear_velocities[row].any() or
+                      self._angular_velocities[row].any())
+        if moving != self._moving[row]:
+            self._moving[row] = moving
+            self._moving_rows_dirty = True
+
+    def set_rows_velocities(self, rows: np.ndarray, rectilinear_velocities: np.ndarray = None,
+                            angular_velocities: np.ndarray = None) -> None:
+        """Assigns the velocities of several bodies at once, see `set_velocities()`.
+
+        Args:
+            rows: The bodies' rows, each at most once.
+            rectilinear_velocities: Velocity of each body in pixels/seconds. Shape (k, 3).
+                Unchanged if `None`.
+            angular_velocities: Counterclockwise angular velocity of each body in degrees/seconds
+                around the x, y, z axis. Shape (k, 3). Unchanged if `None`.
+        """
+        if rectilinear_velocities is not None:
+            self._rectilinear_velocities[rows] = rectilinear_velocities
+        if angular_velocities is not None:
+            self._angular_velocities[rows] = angular_velocities
+        moving = (self._rectilinear_velocities[rows].any(axis=1) |
+                  self._angular_velocities[rows].any(axis=1))
+        if (moving != self._moving[rows]).any():
+            self._moving[rows] = moving
+            self._moving_rows_dirty = True
+
+    def translate(self, row: int, displacement) -> None:
+        """Moves a single body.
+
+        Args:
+            row: The body's row.
+            displacement: Displacement in pixels along the x, y, z axis.
+        """
+        self._positions[row] += displacement
+        self._versions[row] += 1
+        self._version += 1
+
+    def rotate(self, row: int, angular_displacement) -> None:
+        """Rotates a single body around its center.
+
+        Args:
+            row: The body's row.
+            angular_displacement: Counterclockwise rotation in degrees around the x, y, z axis.
+        """
+        rotation = rotation_matrices(np.asarray(angular_displacement, dtype=float)[np.newaxis])[0]
+        self._orientations[row] = rotation @ self._orientations[row]
+        self._versions[row] += 1
+        self._version += 1
+
+    def step(self, dt: float) -> None:
+        """Applies the velocities of every moving body across a time interval.
+
+        Args:
+            dt: Delta time (seconds).
+        """
+        rows = self.moving_rows
+        count = len(rows)
+        if count == 0:
+            return
+        if count == self._size:
+            rows = slice(0, self._size) # basic slicing avoids gathering and scattering copies
+
+        self._displacements = reserve(self._displacements, count)
+        self._positions[rows] += np.multiply(self._rectilinear_velocities[rows], dt,
+                                             out=self._displacements[:count])
+        angular_velocities = self._angular_velocities[rows]
+        spinning = angular_velocities.any(axis=1)
+        if spinning.any():
+            if not spinning.all():
+                rows = self.moving_rows[spinning]
+                angular_velocities = angular_velocities[spinning]
+                count = len(rows)
+            self._rotations = reserve(self._rotations, count)
+            self._rotated = reserve(self._rotated, count)
+            rotations = rotation_matrices(angular_velocities*dt, out=self._rotations[:count])
+            orientations = np.matmul(rotations, self._orientations[rows],
+                                     out=self._rotated[:count])
+
+            # Same as the camera's basis, composed rotations slowly drift from being orthonormal.
+            self._steps_since_orthonormalization += 1
+            if self._steps_since_orthonormalization >= SHAPE_ORTHONORMALIZE_INTERVAL:
+                orientations = orthonormalize(orientations)
+                self._steps_since_orthonormalization = 0
+            self._orientations[rows] = orientations
+
+        self._versions[self.moving_rows] += 1
+        self._version += 1
+
+    def _grow(self) -> None:
+        """Doubles the capacity of every array."""
+        capacity = max(2*len(self._positions), 1)
+        for name in ("_positions", "_orientations", "_rectilinear_velocities",
+                     "_angular_velocities", "_versions", "_moving"):
+            array = getattr(self, name)
+            grown = np.zeros((capacity,) + array.shape[1:], dtype=array.dtype)
+            grown[:len(array)] = array
+            setattr(self, name, grown)
+
+
+def rotation_matrices(angles: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+    """Builds rotation matrices applying a rotation around x, then y, then z.
+
+    Args:
+        angles: Counterclockwise rotations in degrees around the x, y, z axis. Shape (k, 3).
+        out: Array of shape (k, 3, 3) the matrices are written into. A new array is allocated if
+            `None`.
+
+    Returns:
+        The rotation matrices Rz @ Ry @ Rx. Shape (k, 3, 3).
+    """
+    radians = np.radians(angles)
+    cos = np.cos(radians)
+    sin = np.sin(radians)
+    cx, cy, cz = cos[:, 0], cos[:, 1], cos[:, 2]
+    sx, sy, sz = sin[:, 0], sin[:, 1], sin[:, 2]
+
+    matrices = np.empty((len(angles), 3, 3)) if out is None else out
+    matrices[:, 0, 0] = cz*cy
+    matrices[:, 0, 1] = cz*sy*sx - sz*cx
+    matrices[:, 0, 2] = cz*sy*cx + sz*sx
+    matrices[:, 1, 0] = sz*cy
+    matrices[:, 1, 1] = sz*sy*sx + cz*cx
+    matrices[:, 1, 2] = sz*sy*cx - cz*sx
+    matrices[:, 2, 0] = -sy
+    matrices[:, 2, 1] = cy*sx
+    matrices[:, 2, 2] = cy*cx
+    return matrices
+
+
+def orthonormalize(matrices: np.ndarray) -> np.ndarray:
+    """Rebuilds orthonormal matrices from the first two columns (Gram-Schmidt process).
+
+    Args:
+        matrices: Nearly orthonormal matrices. Shape (k, 3, 3).
+
+    Returns:
+        The orthonormal matrices. Shape (k, 3, 3).
+    """
+    col_x = matrices[:, :, 0]
+    col_x = col_x/np.linalg.norm(col_x, axis=1, keepdims=True)
+    col_y = matrices[:, :, 1]
+    col_y = col_y - np.sum(col_y*col_x, axis=1, keepdims=True)*col_x
+    col_y = col_y/np.linalg.norm(col_y, axis=1, keepdims=True)
+    return np.stack((col_x, col_y, np.cross(col_x, col_y)), axis=2)
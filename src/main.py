@@ -3,48 +3,266 @@
 
 This program creates a simulation containing five platonic solids of different colors and displays 
 them in a window.
+
+With `--export-png` or `--export-pipe`, the simulation is instead rendered headless along a camera 
+path and every frame is exported. With `--serve-stdio` or `--serve-socket`, frames are rendered 
+headless for camera poses sent by other processes.
 """
 
+import argparse
+import os
 import sys
+import time
+
+# Start of the startup profile, before the slow imports.
+_START = time.perf_counter()
+
+# Raw frames can be streamed to the standard output, keep pygame's greeting out of it.
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
 
+# pylint: disable=wrong-import-position
 import pygame
-from pygame import Vector3
+from pygame import Rect, Vector3
+from pygame.surface import Surface
 
-from config import Color, SCREEN_WIDTH, SCREEN_HEIGHT, TARGET_FRAME_RATE
+from config import (Color, SCREEN_WIDTH, SCREEN_HEIGHT, TARGET_FRAME_RATE, EXPORT_QUEUE_SIZE,
+                    UI_FONT, UI_FONT_SIZE, FONT_CACHE_PATH)
 from shape_factory import ShapeFactory
 from camera import Camera
+from camera_path import CameraPath
 from world import World
+from point_cloud import PointCloud
 from display import Display
 from engine import Engine
+from exporter import FrameExporter, PngSequenceSink, RawVideoSink, export_frames
+from server import RenderServer
+from startup import StartupProfile, load_font
+from telemetry import Telemetry
 
 __author__ = "Jye-Ming Serres"
 
 
-# Initialize Pygame
-pygame.init()
-clock = pygame.time.Clock()
-screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-pygame.display.set_caption("Projection of 3D shapes")
-pygame.event.set_grab(True)
-pygame.event.set_keyboard_grab(False)
-
-# Initialize the program
-camera = Camera(Vector3(0, 0, 0), 360)
-shape_factory = ShapeFactory()
-tetrahedron = shape_factory.make_shape("tetrahedron", Vector3(600, -600, 0), 100, Color.RED)
-cube = shape_factory.make_shape("cube", Vector3(600, -300, 0), 100, Color.BLUE)
-octahedron = shape_factory.make_shape("octahedron", Vector3(600, 0, 0), 100, Color.GREEN)
-dodecahedron = shape_factory.make_shape("dodecahedron", Vector3(600, 300, 0), 100, Color.YELLOW)
-icosahedron = shape_factory.make_shape("icosahedron", Vector3(600, 600, 0), 100, Color.CYAN)
-world = World(camera, [tetrahedron, cube, octahedron, dodecahedron, icosahedron])
-display = Display(screen)
-engine = Engine(world, display, clock)
-
-while engine.running:
-    clock.tick(TARGET_FRAME_RATE)
-    engine.handle_events()
-    engine.update_world()
+def make_world(point_cloud: str = None) -> World:
+    """Creates the camera and the five platonic solids.
+
+    Args:
+        point_cloud: Path of a point cloud file to show along the solids, see
+            `PointCloud.from_file()`.
+
+    Returns:
+        The world.
+    """
+    camera = Camera(Vector3(0, 0, 0), 360)
+    shape_factory = ShapeFactory()
+    tetrahedron = shape_factory.make_shape("tetrahedron", Vector3(600, -600, 0), 100, Color.RED)
+    cube = shape_factory.make_shape("cube", Vector3(600, -300, 0), 100, Color.BLUE)
+    octahedron = shape_factory.make_shape("octahedron", Vector3(600, 0, 0), 100, Color.GREEN)
+    dodecahedron = shape_factory.make_shape("dodecahedron", Vector3(600, 300, 0), 100,
+                                            Color.YELLOW)
+    icosahedron = shape_factory.make_shape("icosahedron", Vector3(600, 600, 0), 100, Color.CYAN)
+    world = World(camera, [tetrahedron, cube, octahedron, dodecahedron, icosahedron])
+    if point_cloud is not None:
+        world.add_point_cloud(PointCloud.from_file(point_cloud))
+    return world
+
+
+def default_camera_path() -> CameraPath:
+    """A flythrough passing in front of the solids then turning around them.
+
+    Returns:
+        The camera path.
+    """
+    return CameraPath([
+        (0, Vector3(0, -900, 0), Vector3(600, -600, 0)),
+        (4, Vector3(0, 900, 200), Vector3(600, 600, 0)),
+        (8, Vector3(1200, 900, 400), Vector3(600, 0, 0)),
+        (12, Vector3(1200, -900, 0), Vector3(600, 0, 0)),
+        ])
+
+
+def add_overview(display: Display, world: World, layout: str) -> None:
+    """Shows a top-down overview of the solids next to the view of the end user.
+
+    Args:
+        display: The display to add the views to.
+        world: Model of the simulation.
+        layout: "split" to show both views side by side, "pip" to show the overview in a corner
+            over the view of the end user.
+    """
+    overview = Camera(Vector3(600, 0, 1800), 360)
+    overview.look_at(Vector3(600, 0, 0), up=Vector3(1, 0, 0))
+    if layout == "split":
+        display.add_viewport(world.camera, Rect(0, 0, SCREEN_WIDTH//2, SCREEN_HEIGHT))
+        display.add_viewport(overview, Rect(SCREEN_WIDTH//2, 0, SCREEN_WIDTH//2, SCREEN_HEIGHT))
+    else:
+        width, height = SCREEN_WIDTH//4, SCREEN_HEIGHT//4
+        display.add_viewport(world.camera, Rect(0, 0, SCREEN_WIDTH, SCREEN_HEIGHT))
+        display.add_viewport(overview, Rect(SCREEN_WIDTH - width - 20, SCREEN_HEIGHT - height - 20,
+                                            width, height))
+
+
+def run_interactive(profile: StartupProfile, overview: str = None, fast_start: bool = False,
+                    report_startup: bool = False, point_cloud: str = None,
+                    telemetry: Telemetry = None) -> None:
+    """Opens a window and lets the end user traverse the world.
+
+    Args:
+        profile: Records each phase of the startup until the first frame is shown.
+        overview: Layout of the top-down overview, "split" or "pip". No overview if `None`.
+        fast_start: Shows the first frame as early as possible. Only the pygame modules needed for
+            it are initialized and the UI font is resolved from a cache. The remaining modules and
+            the overview are set up after the first frame.
+        report_startup: Prints the startup profile once the startup is done.
+        point_cloud: Path of a point cloud file to show along the solids.
+        telemetry: Records the stages and metrics of every frame.
+    """
+    if fast_start:
+        pygame.display.init()
+        pygame.font.init()
+    else:
+        pygame.init()
+    profile.mark("pygame init")
+    clock = pygame.time.Clock()
+    screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    pygame.display.set_caption("Projection of 3D shapes")
+    profile.mark("window")
+    font = load_font(UI_FONT, UI_FONT_SIZE, FONT_CACHE_PATH if fast_start else None)
+    profile.mark("font")
+
+    world = make_world(point_cloud)
+    display = Display(screen, font=font)
+    if overview is not None and not fast_start:
+        add_overview(display, world, overview)
+    engine = Engine(world, display, clock, telemetry)
+    profile.mark("scene")
     engine.render()
+    profile.mark("first frame")
+
+    if fast_start:
+        pygame.init()
+        if overview is not None:
+            add_overview(display, world, overview)
+        profile.mark("deferred setup")
+    pygame.event.set_grab(True)
+    pygame.event.set_keyboard_grab(False)
+    if report_startup:
+        profile.report()
+
+    while engine.running:
+        clock.tick(TARGET_FRAME_RATE)
+        engine.handle_events()
+        engine.update_world()
+        engine.render()
+
+
+def init_headless() -> Surface:
+    """Initializes pygame without a window.
+
+    Returns:
+        An off-screen surface the size of the screen.
+    """
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    pygame.init()
+    return Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+
+
+def run_export(args: argparse.Namespace, telemetry: Telemetry = None) -> None:
+    """Renders the world off-screen along a camera path and exports every frame.
+
+    Args:
+        args: Parsed command line arguments.
+        telemetry: Records the stages and metrics of every frame.
+    """
+    screen = init_headless()
+    world = make_world(args.point_cloud)
+    display = Display(screen)
+    if args.overview is not None:
+        add_overview(display, world, args.overview)
+    engine = Engine(world, display, pygame.time.Clock(), telemetry)
+    camera_path = default_camera_path() if args.path is None else CameraPath.from_json(args.path)
+
+    if args.export_png is not None:
+        sink = PngSequenceSink(args.export_png)
+    else:
+        sink = RawVideoSink(args.export_pipe)
+    exporter = FrameExporter(screen, sink, EXPORT_QUEUE_SIZE)
+    fps = export_frames(engine, camera_path, args.fps, exporter)
+    print(f"Exported {exporter.frame_count} frames at {fps:.1f} frames/second "
+          f"(rendering waited {exporter.stall_time:.2f} s on the writer)", file=sys.stderr)
+
+
+def run_server(args: argparse.Namespace) -> None:
+    """Renders the world off-screen for camera poses sent by other processes.
+
+    Args:
+        args: Parsed command line arguments.
+    """
+    screen = init_headless()
+    display = Display(screen)
+    display.show_ui = False
+    server = RenderServer(make_world(args.point_cloud), display, screen)
+    if args.serve_socket is not None:
+        server.serve_unix_socket(args.serve_socket)
+    else:
+        server.serve_stream(sys.stdin.buffer, sys.stdout.buffer)
+
+
+def main() -> None:
+    profile = StartupProfile(_START)
+    parser = argparse.ArgumentParser(description="A showcase of perspective projection.")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--export-png", metavar="DIR",
+                        help="render headless and save every frame as a numbered PNG in DIR")
+    mode.add_argument("--export-pipe", metavar="COMMAND",
+                        help="render headless and stream raw RGB frames to COMMAND's standard "
+                             "input, or to the standard output if COMMAND is '-'")
+    mode.add_argument("--serve-stdio", action="store_true",
+                      help="render frames for camera poses read from the standard input and write "
+                           "them to the standard output")
+    mode.add_argument("--serve-socket", metavar="PATH",
+                      help="render frames for camera poses sent through a Unix socket at PATH")
+    parser.add_argument("--path", metavar="JSON",
+                        help="camera path keyframes used when exporting")
+    parser.add_argument("--fps", type=float, default=60,
+                        help="frames per second of the exported sequence")
+    parser.add_argument("--overview", choices=("split", "pip"),
+                        help="show a top-down overview side by side (split) or in a corner (pip)")
+    parser.add_argument("--point-cloud", metavar="FILE",
+                        help="show a point cloud from a .npy file of shape (n, 3) or a raw file "
+                             "of float32 x, y, z triplets")
+    parser.add_argument("--fast-start", action="store_true",
+                        help="show the window's first frame as early as possible, with a cached "
+                             "UI font and deferred setup")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="print how long each phase of the startup took until the window's "
+                             "first frame")
+    parser.add_argument("--telemetry-jsonl", metavar="FILE",
+                        help="write the stages and metrics of every frame to FILE as JSON Lines")
+    parser.add_argument("--telemetry-trace", metavar="FILE",
+                        help="write the stages and metrics of every frame to FILE as a Chrome "
+                             "trace, to open in chrome://tracing or Perfetto")
+    args = parser.parse_args()
+    profile.mark("imports")
+
+    telemetry = None
+    if args.telemetry_jsonl is not None or args.telemetry_trace is not None:
+        telemetry = Telemetry()
+
+    if args.serve_stdio or args.serve_socket is not None:
+        run_server(args)
+    elif args.export_png is not None or args.export_pipe is not None:
+        run_export(args, telemetry)
+    else:
+        run_interactive(profile, args.overview, args.fast_start, args.profile_startup,
+                        args.point_cloud, telemetry)
+
+    if args.telemetry_jsonl is not None:
+        telemetry.write_jsonl(args.telemetry_jsonl)
+    if args.telemetry_trace is not None:
+        telemetry.write_chrome_trace(args.telemetry_trace)
+    pygame.quit()
+    sys.exit()
+
 
-pygame.quit()
-sys.exit()
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Provides the geometry shared between shapes.
+
+Classes:
+    Mesh
+"""
+
+import numpy as np
+
+__author__ = "Jye-Ming Serres"
+
+
+class Mesh:
+    """Vertices, edges and faces of a shape in its local space, stored in compact arrays.
+
+    A mesh is never modified once created, so any number of shapes can share the same instance.
+
+    Vertices are stored as float32 and indices as int32.
+    """
+
+    __slots__ = ("_vertices", "_edges", "_faces", "_face_normals", "_face_offsets",
+                 "_edge_faces", "_radius")
+
+    def __init__(self, vertices, edges, faces: list[tuple[int, ...]] = None) -> None:
+        """Creates an instance from vertices, edges and optional faces.
+
+        Args:
+            vertices: Coordinates of each vertex relative to the shape's center.
+            edges: Association table between vertices. Each pair (an edge) contains the index of
+                both connecting vertices.
+            faces: Each tuple (a face) contains the index of its vertices, counterclockwise when
+                seen from outside the shape.
+        """
+        self._vertices = np.array(vertices, dtype=np.float32).reshape(-1, 3)
+        self._edges = np.array(edges, dtype=np.int32).reshape(-1, 2)
+        self._radius = float(np.linalg.norm(self._vertices, axis=1).max(initial=0))
+        self._faces = None if faces is None else [tuple(face) for face in faces]
+        self._face_normals = None
+        self._face_offsets = None
+        self._edge_faces = None
+        if faces is not None:
+            self._init_faces()
+        for array in (self._vertices, self._edges, self._face_normals, self._face_offsets,
+                      self._edge_faces):
+            if array is not None:
+                array.flags.writeable = False
+
+    @property
+    def vertices(self) -> np.ndarray:
+        """Coordinates of each vertex relative to the shape's center. Shape (n, 3)."""
+        return self._vertices
+
+    @property
+    def radius(self) -> float:
+        """Distance from the center to the furthest vertex."""
+        return self._radius
+
+    @property
+    def edges(self) -> np.ndarray:
+        """Index of both connecting vertices of each edge. Shape (e, 2)."""
+        return self._edges
+
+    @property
+    def faces(self) -> list[tuple[int, ...]] | None:
+        """Each tuple (a face) contains the index of its vertices, counterclockwise when seen from
+        outside the shape. `None` if the mesh was not defined with faces."""
+        return self._faces
+
+    @property
+    def face_normals(self) -> np.ndarray | None:
+        """Outward unit normal of each face. Shape (f, 3)."""
+        return self._face_normals
+
+    @property
+    def face_offsets(self) -> np.ndarray | None:
+        """Distance from the center to the plane of each face along its normal. Shape (f,)."""
+        return self._face_offsets
+
+    @property
+    def edge_faces(self) -> np.ndarray | None:
+        """Index of the two faces adjacent to each edge. Shape (e, 2).
+
+        Edges without faces have the index `len(faces)`.
+        """
+        return self._edge_faces
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes used by the mesh's arrays."""
+        return sum(array.nbytes for array in (self._vertices, self._edges, self._face_normals,
+                                              self._face_offsets, self._edge_faces)
+                   if array is not None)
+
+    def _init_faces(self) -> None:
+        """Computes the outward normal of each face and the faces adjacent to each edge."""
+        # Faces are planar, their first three vertices are enough to find their plane.
+        points = self._vertices[[face[:3] for face in self._faces]].astype(float).reshape(-1, 3, 3)
+        normals = np.cross(points[:, 1] - points[:, 0], points[:, 2] - points[:, 1])
+        normals /= np.linalg.norm(normals, axis=1, keepdims=True)
+        offsets = np.einsum("ij,ij->i", normals, points[:, 0])
+        self._face_normals = normals.astype(np.float32)
+        self._face_offsets = offsets.astype(np.float32)
+
+        # Each edge of a closed shape is shared by two faces. Edges without faces point to an
+        # extra element past the last face.
+        faces_by_edge = {}
+        for i, face in enumerate(self._faces):
+            for j, vertex in enumerate(face):
+                edge = frozenset((vertex, face[j - 1]))
+                faces_by_edge.setdefault(edge, []).append(i)
+        self._edge_faces = np.full((len(self._edges), 2), len(self._faces), dtype=np.int32)
+        for i, edge in enumerate(self._edges.tolist()):
+            adjacent = faces_by_edge.get(frozenset(edge))
+            if adjacent:
+                self._edge_faces[i] = adjacent[0], adjacent[-1]
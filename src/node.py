@@ -0,0 +1,195 @@
+"""Provides the nodes of the scene graph.
+
+Classes:
+    Node
+    Group
+"""
+
+import sys
+
+import numpy as np
+from pygame import Vector3
+
+from kinematics import Kinematics
+
+__author__ = "Jye-Ming Serres"
+
+
+class Node:
+    """Parent class for everything positioned in the world: shapes and groups of them.
+
+    The node's position, orientation and velocities are a row of a `Kinematics` instance, relative
+    to its parent group if it has one, or to the world. A node owns a single row instance until it
+    is attached to the shared one of a world.
+
+    World transforms are derived lazily. Every change of a node's own transform increments its row
+    version, and a node's `transform_version` adds up the versions of the node and its ancestors,
+    so moving a group is a single row update that makes every node below it out of date. World
+    transforms are only recomputed when requested from an out of date node.
+
+    Attributes:
+        rectilinear_velocity (:obj:`pygame.Vector3`): The node's current velocity in
+            pixels/seconds, in its parent's space.
+        angular_velocity (:obj:`pygame.Vector3`): The node's current counterclockwise angular
+            velocity in degrees/seconds around the x, y, z axis of its parent's space.
+
+    Velocities are copies of the underlying data and should be assigned rather than modified in
+    place.
+
+    Methods:
+        attach()
+        update()
+        move()
+        rotate()
+    """
+
+    __slots__ = ("_kinematics", "_row", "_parent", "_world_transform", "_world_version")
+
+    def _init_node(self, center: Vector3) -> None:
+        """Initializes the node's transform. Shared by every constructor.
+
+        Args:
+            center: Position of the node's center.
+        """
+        self._kinematics = Kinematics(capacity=1)
+        self._row = self._kinematics.add(tuple(center))
+        self._parent = None
+        self._world_transform = None # only cached for nodes with a parent
+        self._world_version = -1
+
+    @property
+    def parent(self) -> "Group | None":
+        """The group the node belongs to, if any."""
+        return self._parent
+
+    @property
+    def center(self) -> Vector3:
+        """Position of the node's center in world space. (copy)"""
+        return Vector3(tuple(self.world_transform[1]))
+
+    @property
+    def local_center(self) -> Vector3:
+        """Position of the node's center relative to its parent. (copy)"""
+        return Vector3(tuple(self._kinematics.positions[self._row]))
+
+    @property
+    def transform_version(self) -> int:
+        """Incremented every time the node or one of its ancestors moves or rotates."""
+        version = int(self._kinematics.versions[self._row])
+        if self._parent is not None:
+            version += self._parent.transform_version
+        return version
+
+    @property
+    def world_transform(self) -> tuple[np.ndarray, np.ndarray]:
+        """Rotation matrix from the node's local space to world space, shape (3, 3), and position
+        of its center in world space, shape (3,). (read only)"""
+        orientation = self._kinematics.orientations[self._row]
+        position = self._kinematics.positions[self._row]
+        if self._parent is None:
+            return orientation, position
+        version = self.transform_version
+        if version != self._world_version:
+            parent_orientation, parent_position = self._parent.world_transform
+            self._world_transform = (parent_orientation @ orientation,
+                                     parent_orientation @ position + parent_position)
+            self._world_version = version
+        return self._world_transform
+
+    @property
+    def rectilinear_velocity(self) -> Vector3:
+        """The node's current velocity in pixels/seconds. (copy)"""
+        return Vector3(tuple(self._kinematics.rectilinear_velocities[self._row]))
+
+    @rectilinear_velocity.setter
+    def rectilinear_velocity(self, velocity: Vector3) -> None:
+        self._kinematics.set_velocities(self._row, rectilinear_velocity=tuple(velocity))
+
+    @property
+    def angular_velocity(self) -> Vector3:
+        """The node's current counterclockwise angular velocity in degrees/seconds around the x,
+        y, z axis. (copy)"""
+        return Vector3(tuple(self._kinematics.angular_velocities[self._row]))
+
+    @angular_velocity.setter
+    def angular_velocity(self, velocity: Vector3) -> None:
+        self._kinematics.set_velocities(self._row, angular_velocity=tuple(velocity))
+
+    @property
+    def is_moving(self) -> bool:
+        """Whether the node has a non-zero rectilinear or angular velocity."""
+        return bool(self._kinematics.rectilinear_velocities[self._row].any()
+                    or self._kinematics.angular_velocities[self._row].any())
+
+    def attach(self, kinematics: Kinematics, parent: "Group" = None) -> None:
+        """Moves the node's position, orientation and velocities into a shared instance.
+
+        Args:
+            kinematics: The instance that will step the node from now on.
+            parent: The group the node belongs to from now on. Its current transform becomes
+                relative to the group.
+        """
+        old_kinematics, old_row = self._kinematics, self._row
+        # The new row starts past the node's current version, so that the transform version only
+        # ever increases and data cached for the old transform (like world space vertices) is
+        # recomputed whatever the versions of the new ancestors.
+        self._row = kinematics.add(
+            old_kinematics.positions[old_row],
+            old_kinematics.orientations[old_row],
+            old_kinematics.rectilinear_velocities[old_row],
+            old_kinematics.angular_velocities[old_row],
+            self.transform_version + 1)
+        self._kinematics = kinematics
+        self._parent = parent
+        self._world_version = -1
+
+    def update(self, dt: float) -> None:
+        """Applies the node's rectilinear and angular velocity accross a time interval.
+
+        Nodes attached to a world are stepped all at once by the world instead.
+
+        Args:
+            dt: Delta time (seconds).
+        """
+        self.move(self.rectilinear_velocity * dt)
+        self.rotate(self.angular_velocity * dt)
+
+    def move(self, displacement: Vector3) -> None:
+        """Moves the node, and every node below it.
+
+        Args:
+            displacement: Displacement in pixels along the x, y, z axis of the parent's space.
+        """
+        self._kinematics.translate(self._row, tuple(displacement))
+
+    def rotate(self, angular_displacement: Vector3) -> None:
+        """Rotates the node around its center, and every node below it.
+
+        Args:
+            angular_displacement: Counterclockwise rotation in degrees around the x, y, z axis of
+                the parent's space.
+        """
+        self._kinematics.rotate(self._row, tuple(angular_displacement))
+
+
+class Group(Node):
+    """A node without geometry that moves the shapes and groups attached to it as one.
+
+    Children are attached through `World.add_shape()` and `World.add_group()`, and are then
+    positioned relative to the group's center and orientation.
+    """
+
+    __slots__ = ()
+
+    def __init__(self, center: Vector3) -> None:
+        """Creates an instance centered on a position.
+
+        Args:
+            center: Position of the group's center, relative to its parent once attached.
+        """
+        self._init_node(center)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes used by the group itself, excluding its kinematics row."""
+        return sys.getsizeof(self)
@@ -0,0 +1,133 @@
+"""Provides large point clouds read straight from disk.
+
+Classes:
+    PointCloud
+"""
+
+import math
+import mmap
+
+import numpy as np
+
+from config import Color, POINT_CLOUD_CHUNK, POINT_CLOUD_BLOCK
+
+__author__ = "Jye-Ming Serres"
+
+
+class PointCloud:
+    """Points in world space, memory-mapped from a file so that only the points drawn are read.
+
+    Points are visited in passes. The file is cut into blocks of `POINT_CLOUD_BLOCK` consecutive
+    points, and a pass holds every block whose index b satisfies b % pass_count == p for some
+    offset p. Every pass is therefore spread over the whole cloud, so that the first passes alone
+    already give a coarse view of it, while only reading the pages of the file holding its own
+    blocks. Offsets are visited in bit-reversed order, so that every pass falls halfway between the
+    blocks read so far. Each pass holds at most `POINT_CLOUD_CHUNK` points.
+
+    Methods:
+        from_file()
+        get_pass()
+    """
+
+    def __init__(self, points: np.ndarray, color: Color = Color.WHITE) -> None:
+        """Creates an instance from an array, possibly memory-mapped.
+
+        Args:
+            points: Coordinates of each point in world space. Shape (n, 3).
+            color: Color used to draw the points.
+
+        Raises:
+            ValueError: If the array is not made of 3D points.
+        """
+        if points.ndim != 2 or points.shape[1] != 3:
+            raise ValueError(f"Expected points of shape (n, 3), got {points.shape}")
+        self._points = points
+        self._color = color
+        block_count = math.ceil(len(points)/POINT_CLOUD_BLOCK)
+        blocks_per_pass = max(POINT_CLOUD_CHUNK//POINT_CLOUD_BLOCK, 1)
+        self._pass_count = max(math.ceil(block_count/blocks_per_pass), 1)
+        self._pass_size = math.ceil(block_count/self._pass_count)*POINT_CLOUD_BLOCK
+        self._offsets = _bit_reversed_order(self._pass_count)
+
+    @classmethod
+    def from_file(cls, path: str, color: Color = Color.WHITE) -> "PointCloud":
+        """Memory-maps a point cloud file.
+
+        Passes read scattered blocks of the file, so the kernel is told not to read ahead of them:
+        pages between two blocks belong to later passes.
+
+        Args:
+            path: A `.npy` file of shape (n, 3), or a raw file of little-endian float32
+                coordinates x, y, z for each point.
+            color: Color used to draw the points.
+
+        Returns:
+            The point cloud.
+        """
+        with open(path, "rb") as file:
+            if path.endswith(".npy"):
+                version = np.lib.format.read_magic(file)
+                read_header = (np.lib.format.read_array_header_1_0 if version == (1, 0)
+                               else np.lib.format.read_array_header_2_0)
+                shape, fortran_order, dtype = read_header(file)
+                offset = file.tell()
+            else:
+                shape, fortran_order, dtype, offset = (-1, 3), False, np.dtype("<f4"), 0
+            mapping = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if hasattr(mmap, "MADV_RANDOM"): # not available on every platform
+            mapping.madvise(mmap.MADV_RANDOM)
+        count = (len(mapping) - offset)//dtype.itemsize
+        points = np.frombuffer(mapping, dtype, count, offset).reshape(
+            shape, order="F" if fortran_order else "C")
+        return cls(points, color)
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    @property
+    def color(self) -> Color:
+        """Color used to draw the points."""
+        return self._color
+
+    @property
+    def pass_count(self) -> int:
+        """Number of passes needed to visit every point."""
+        return self._pass_count
+
+    @property
+    def pass_size(self) -> int:
+        """Number of points of the largest passes."""
+        return self._pass_size
+
+    def get_pass(self, index: int) -> np.ndarray:
+        """Reads the points of a pass.
+
+        Args:
+            index: Number of the pass, from 0 to `pass_count - 1`.
+
+        Returns:
+            Coordinates of the points of the pass as float64. Shape (k, 3).
+        """
+        points = self._points
+        offset = self._offsets[index]
+        full_blocks = len(points)//POINT_CLOUD_BLOCK
+        blocks = points[:full_blocks*POINT_CLOUD_BLOCK].reshape(full_blocks, POINT_CLOUD_BLOCK, 3)
+        chunk = np.asarray(blocks[offset::self._pass_count], dtype=np.float64).reshape(-1, 3)
+        if len(points) > full_blocks*POINT_CLOUD_BLOCK and full_blocks % self._pass_count == offset:
+            last_block = np.asarray(points[full_blocks*POINT_CLOUD_BLOCK:], dtype=np.float64)
+            chunk = np.concatenate((chunk, last_block))
+        return chunk
+
+
+def _bit_reversed_order(count: int) -> list[int]:
+    """Orders numbers so that each one falls in the largest gap left by the ones before it.
+
+    Args:
+        count: How many numbers, from 0 to `count - 1`.
+
+    Returns:
+        The numbers sorted by the reverse of their binary representation, on as many bits as the
+        largest one needs.
+    """
+    bits = max(count - 1, 0).bit_length()
+    return sorted(range(count), key=lambda number: int(f"{number:0{bits}b}"[::-1] or "0", 2))
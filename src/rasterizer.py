@@ -0,0 +1,383 @@
+"""Draw batches of line segments onto a surface.
+
+Classes:
+    Rasterizer
+    AalineRasterizer
+    PixelRasterizer
+    TiledRasterizer
+"""
+
+import threading
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pygame
+from pygame import draw
+from pygame.surface import Surface
+
+from config import (RASTERIZER_BATCH_POINTS, RASTERIZER_BATCH_SEGMENTS, RASTERIZER_TILE_SIZE,
+                    RASTERIZER_THREADS, CLIP_MARGIN)
+from clipping import clip_segments
+
+__author__ = "Jye-Ming Serres"
+
+
+class Rasterizer(ABC):
+    """Abstract class. Draws every line segment of a frame at once.
+
+    Segments are drawn in order, later segments over earlier ones.
+
+    Attributes:
+        clips_to_surface (`bool`): Whether the work of drawing a segment is bounded by the part of
+            it on the surface, so that callers need not clip segments to the surface first.
+
+    Methods:
+        draw_segments()
+        close()
+    """
+
+    name = ""
+    clips_to_surface = False
+
+    @abstractmethod
+    def draw_segments(self, surface: Surface, segments: np.ndarray, colors: np.ndarray,
+                      origin: tuple[int, int] = (0, 0)) -> None:
+        """Draws line segments.
+
+        Args:
+            surface: The surface to draw on.
+            segments: Screen coordinates (x0, y0, x1, y1) of each segment. Shape (e, 4).
+            colors: Color of each segment, mapped to the surface's pixel format. Shape (e,).
+            origin: Screen coordinates of the surface's top left corner, when the surface only
+                covers a region of the screen.
+        """
+        pass
+
+    def close(self) -> None:
+        """Releases the resources held by the rasterizer, if any."""
+
+
+class AalineRasterizer(Rasterizer):
+    """Draws each segment with `pygame.draw.aaline`. Antialiased but pays a call per segment.
+
+    Segments are converted to Python floats `RASTERIZER_BATCH_SEGMENTS` at a time, so that the
+    memory used by the conversion does not grow with the number of segments.
+    """
+
+    name = "aaline"
+
+    def draw_segments(self, surface: Surface, segments: np.ndarray, colors: np.ndarray,
+                      origin: tuple[int, int] = (0, 0)) -> None:
+        if origin != (0, 0):
+            segments = segments - origin*2
+        for start in range(0, len(segments), RASTERIZER_BATCH_SEGMENTS):
+            end = start + RASTERIZER_BATCH_SEGMENTS
+            for (x0, y0, x1, y1), color in zip(segments[start:end].tolist(),
+                                               colors[start:end].tolist()):
+                draw.aaline(surface, color, (x0, y0), (x1, y1))
+
+
+class PixelRasterizer(Rasterizer):
+    """Writes the pixels of every segment directly into the surface's buffer.
+
+    Points along the segments are generated with a vectorized DDA, in batches of at most
+    `RASTERIZER_BATCH_POINTS` points (a segment longer than that is a batch of its own), and
+    written through a zero-copy `pygame.surfarray.pixels2d` view. Lines are not antialiased.
+
+    Only the steps of a segment whose points can land on the surface are generated, with the same
+    parametrization as the whole segment. A segment is therefore drawn with the same pixels whether
+    the surface covers the whole screen or only a region of it, and its cost is bounded by its part
+    on the surface.
+
+    The arrays of a batch are written into buffers kept from batch to batch, so that drawing does
+    not allocate them again every frame.
+    """
+
+    name = "pixels"
+    clips_to_surface = True
+
+    def __init__(self) -> None:
+        """Creates an instance without buffers, they are allocated by the first batches."""
+        # Each thread drawing with the instance, like those of a `TiledRasterizer`, has its own.
+        self._buffers = threading.local()
+
+    def draw_segments(self, surface: Surface, segments: np.ndarray, colors: np.ndarray,
+                      origin: tuple[int, int] = (0, 0)) -> None:
+        width, height = surface.get_size()
+        left, top = origin
+        segments = np.asarray(segments, dtype=np.float64)
+
+        # Segments entirely on one side of the surface have no pixel to write. Their bounds are
+        # computed one at a time into the same array.
+        bounds = np.maximum(segments[:, 0], segments[:, 2]) # right
+        on_surface = bounds >= left - 1
+        np.minimum(segments[:, 0], segments[:, 2], out=bounds) # left
+        on_surface &= bounds < left + width
+        np.maximum(segments[:, 1], segments[:, 3], out=bounds) # bottom
+        on_surface &= bounds >= top - 1
+        np.minimum(segments[:, 1], segments[:, 3], out=bounds) # top
+        on_surface &= bounds < top + height
+        colors = np.asarray(colors)
+        if not on_surface.all():
+            segments = segments[on_surface]
+            colors = colors[on_surface]
+        if len(segments) == 0:
+            return
+
+        deltas = segments[:, 2:] - segments[:, :2]
+        steps = np.ceil(np.abs(deltas).max(axis=1)).astype(np.int64)
+        first_steps, last_steps = self._visible_steps(segments, deltas, steps, origin,
+                                                      (width, height))
+        visible = first_steps <= last_steps
+        if not visible.all():
+            segments = segments[visible]
+            deltas = deltas[visible]
+            steps = steps[visible]
+            first_steps = first_steps[visible]
+            last_steps = last_steps[visible]
+            colors = colors[visible]
+            if len(segments) == 0:
+                return
+        point_counts = last_steps - first_steps + 1
+
+        pixels = pygame.surfarray.pixels2d(surface)
+        try:
+            # Split the segments into batches of bounded number of points.
+            ends = np.cumsum(point_counts)
+            batch_ends = np.searchsorted(ends, np.arange(RASTERIZER_BATCH_POINTS, ends[-1],
+                                                         RASTERIZER_BATCH_POINTS), side="right")
+            bounds = np.unique(np.concatenate(([0], batch_ends, [len(segments)])))
+            for first, last in zip(bounds[:-1].tolist(), bounds[1:].tolist()):
+                self._draw_batch(pixels, segments[first:last], deltas[first:last],
+                                 steps[first:last], first_steps[first:last],
+                                 point_counts[first:last], colors[first:last], origin)
+        finally:
+            del pixels # unlocks the surface
+
+    @staticmethod
+    def _visible_steps(segments: np.ndarray, deltas: np.ndarray, steps: np.ndarray,
+                       origin: tuple[int, int],
+                       size: tuple[int, int]) -> tuple[np.ndarray, np.ndarray]:
+        """Finds the range of steps of each segment whose points can land on a surface.
+
+        The range is widened by a step on both sides so that rounding never leaves out a point,
+        the points outside of the surface are dropped when written.
+
+        Args:
+            segments: Screen coordinates (x0, y0, x1, y1) of each segment. Shape (e, 4).
+            deltas: (x1 - x0, y1 - y0) of each segment. Shape (e, 2).
+            steps: Number of unit steps along the major axis of each segment. Shape (e,).
+            origin: Screen coordinates of the surface's top left corner.
+            size: Width and height of the surface.
+
+        Returns:
+            The first and last step of each segment, empty if the first is after the last.
+        """
+        first_steps = np.zeros(len(segments))
+        last_steps = steps.astype(np.float64)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            for axis in (0, 1):
+                # Steps where the coordinate is within half a pixel of the surface, in either
+                # order. Segments parallel to the axis are already known to be within it.
+                step_lengths = deltas[:, axis]/np.maximum(steps, 1)
+                low = (origin[axis] - 0.5 - segments[:, axis])/step_lengths
+                high = (origin[axis] + size[axis] - 0.5 - segments[:, axis])/step_lengths
+                crossing = step_lengths != 0
+                np.maximum(first_steps, np.floor(np.minimum(low, high)) - 1, out=first_steps,
+                           where=crossing)
+                np.minimum(last_steps, np.ceil(np.maximum(low, high)) + 1, out=last_steps,
+                           where=crossing)
+        return first_steps.astype(np.int64), last_steps.astype(np.int64)
+
+    def _draw_batch(self, pixels: np.ndarray, segments: np.ndarray, deltas: np.ndarray,
+                    steps: np.ndarray, first_steps: np.ndarray, point_counts: np.ndarray,
+                    colors: np.ndarray, origin: tuple[int, int]) -> None:
+        """Generates the points of a batch of segments and writes them into the pixel array.
+
+        Args:
+            pixels: 2D view of the surface's pixels, indexed by (x, y).
+            segments: Screen coordinates (x0, y0, x1, y1) of each segment. Shape (e, 4).
+            deltas: (x1 - x0, y1 - y0) of each segment. Shape (e, 2).
+            steps: Number of unit steps along the major axis of each segment. Shape (e,).
+            first_steps: First step generated of each segment. Shape (e,).
+            point_counts: Number of steps generated of each segment. Shape (e,).
+            colors: Mapped color of each segment. Shape (e,).
+            origin: Screen coordinates of the surface's top left corner.
+        """
+        width, height = pixels.shape
+        count = int(point_counts.sum())
+        firsts = np.cumsum(point_counts) - point_counts
+
+        # Segment of each point: 1 where a segment starts, accumulated.
+        owners = self._buffer("owners", count, np.intp)
+        owners.fill(0)
+        owners[firsts[1:]] = 1
+        np.cumsum(owners, out=owners)
+
+        # Position of each point along its whole segment, from 0 to 1.
+        ratios = self._buffer("ratios", count, np.float64)
+        indices = self._buffer("indices", count, np.intp)
+        ratios[:] = self._buffer("range", count, np.float64, np.arange)
+        ratios -= np.take(firsts - first_steps, owners, out=indices, mode="clip")
+        ratios /= np.take(np.maximum(steps, 1), owners, out=indices, mode="clip")
+
+        xs = self._buffer("xs", count, np.intp)
+        ys = self._buffer("ys", count, np.intp)
+        coordinates = self._buffer("coordinates", count, np.float64)
+        offsets = self._buffer("offsets", count, np.float64)
+        for axis, out in ((0, xs), (1, ys)):
+            np.take(deltas[:, axis], owners, out=coordinates, mode="clip")
+            coordinates *= ratios
+            coordinates += np.take(segments[:, axis], owners, out=offsets, mode="clip")
+            np.copyto(out, np.rint(coordinates, out=coordinates), casting="unsafe")
+            if origin[axis] != 0: # after rounding, so that the pixels do not depend on it
+                out -= origin[axis]
+
+        inside = self._buffer("inside", count, np.bool_)
+        inside_axis = self._buffer("inside_axis", count, np.bool_)
+        np.greater_equal(xs, 0, out=inside)
+        inside &= np.less(xs, width, out=inside_axis)
+        inside &= np.greater_equal(ys, 0, out=inside_axis)
+        inside &= np.less(ys, height, out=inside_axis)
+        point_colors = np.take(colors, owners, out=self._buffer("colors", count, colors.dtype),
+                               mode="clip")
+        if not inside.all():
+            kept = np.flatnonzero(inside)
+            xs = np.take(xs, kept, out=self._buffer("kept_xs", len(kept), np.intp), mode="clip")
+            ys = np.take(ys, kept, out=self._buffer("kept_ys", len(kept), np.intp), mode="clip")
+            point_colors = np.take(point_colors, kept, mode="clip",
+                                   out=self._buffer("kept_colors", len(kept), colors.dtype))
+        pixels[xs, ys] = point_colors
+
+    def _buffer(self, name: str, length: int, dtype: np.dtype, fill=None) -> np.ndarray:
+        """Gets a buffer of the calling thread, reused from batch to batch.
+
+        Args:
+            name: Name of the buffer.
+            length: Number of elements needed.
+            dtype: Data type of the buffer.
+            fill: Function filling a new buffer from its length, like `np.arange`. The buffer is
+                uninitialized if `None`.
+
+        Returns:
+            The first `length` elements of the buffer.
+        """
+        buffer = getattr(self._buffers, name, None)
+        if buffer is None or buffer.dtype != dtype or len(buffer) < length:
+            size = length if buffer is None else max(length, 2*len(buffer))
+            buffer = np.empty(size, dtype=dtype) if fill is None else fill(size, dtype=dtype)
+            setattr(self._buffers, name, buffer)
+        return buffer[:length]
+
+class TiledRasterizer(Rasterizer):
+    """Splits the surface into square tiles drawn in parallel by worker threads.
+
+    Each segment is binned to every tile its bounding box touches. Each tile is copied out of the
+    surface with a margin of `CLIP_MARGIN` pixels, draws its own segments in order with another
+    rasterizer, then is copied back without its margin. Tiles are separate surfaces rather than
+    subsurfaces because antialiased lines drawn on a subsurface blend with the wrong pixels. Copies
+    happen on the calling thread, drawing happens on the worker threads.
+
+    Long segments must only cost the pixels they cover in each tile. A rasterizer that clips to its
+    surface, like `PixelRasterizer`, draws them whole and the tiles are identical to drawing on the
+    whole surface. Otherwise, the segments crossing tiles are clipped to each tile and its margin
+    first, and the intensity of a few antialiased pixels near their clipped ends can differ.
+
+    Threads only run at the same time while the other rasterizer releases the GIL, like numpy does
+    for most of the work of `PixelRasterizer`.
+    """
+
+    name = "tiled"
+    clips_to_surface = True
+
+    def __init__(self, rasterizer: Rasterizer = None, tile_size: int = RASTERIZER_TILE_SIZE,
+                 thread_count: int = RASTERIZER_THREADS) -> None:
+        """Creates an instance and its worker threads.
+
+        Args:
+            rasterizer: Draws the segments of each tile. Defaults to a `PixelRasterizer`.
+            tile_size: Width and height of the tiles in pixels.
+            thread_count: Number of worker threads. Tiles are drawn by the calling thread if 1.
+
+        Raises:
+            ValueError: If the tile size or the number of threads is not positive.
+        """
+        if tile_size < 1 or thread_count < 1:
+            raise ValueError(f"Expected a positive tile size and number of threads, got "
+                             f"{tile_size} and {thread_count}")
+        self._rasterizer = PixelRasterizer() if rasterizer is None else rasterizer
+        self._tile_size = tile_size
+        self._executor = ThreadPoolExecutor(thread_count) if thread_count > 1 else None
+        self.name = f"{self.name} {self._rasterizer.name} ({thread_count} threads)"
+
+    def draw_segments(self, surface: Surface, segments: np.ndarray, colors: np.ndarray,
+                      origin: tuple[int, int] = (0, 0)) -> None:
+        width, height = surface.get_size()
+        size = self._tile_size
+        segments = np.asarray(segments, dtype=np.float64)
+        colors = np.asarray(colors)
+        left, top = origin
+
+        # Range of tile columns and rows touched by each segment.
+        x_min = np.minimum(segments[:, 0], segments[:, 2]) - left
+        x_max = np.maximum(segments[:, 0], segments[:, 2]) - left
+        y_min = np.minimum(segments[:, 1], segments[:, 3]) - top
+        y_max = np.maximum(segments[:, 1], segments[:, 3]) - top
+        reach = CLIP_MARGIN + 1
+        first_columns = np.floor((x_min - reach)/size)
+        last_columns = np.floor((x_max + reach)/size)
+        first_rows = np.floor((y_min - reach)/size)
+        last_rows = np.floor((y_max + reach)/size)
+        in_columns = [(first_columns <= column) & (last_columns >= column)
+                      for column in range(-(-width//size))]
+        # Segments within a single tile need no clipping.
+        clipping = not self._rasterizer.clips_to_surface
+        spanning = (last_columns > first_columns) | (last_rows > first_rows)
+
+        bounds = surface.get_rect()
+        tiles = []
+        for row in range(-(-height//size)):
+            in_row = (first_rows <= row) & (last_rows >= row)
+            for column, in_column in enumerate(in_columns):
+                binned = np.flatnonzero(in_row & in_column)
+                if len(binned):
+                    rect = pygame.Rect(column*size, row*size, size, size).clip(bounds)
+                    margin_rect = rect.inflate(2*CLIP_MARGIN, 2*CLIP_MARGIN).clip(bounds)
+                    tiles.append((surface.subsurface(margin_rect).copy(), binned,
+                                  margin_rect.topleft, rect))
+
+        def draw_tile(tile: tuple[Surface, np.ndarray, tuple[int, int], pygame.Rect]) -> None:
+            tile_surface, binned, (x, y), rect = tile
+            tile_segments = segments[binned]
+            tile_colors = colors[binned]
+            crossing = np.flatnonzero(spanning[binned]) if clipping else []
+            if len(crossing):
+                clipped, kept = clip_segments(tile_segments[crossing],
+                                              left + rect.left - CLIP_MARGIN,
+                                              top + rect.top - CLIP_MARGIN,
+                                              left + rect.right - 1 + CLIP_MARGIN,
+                                              top + rect.bottom - 1 + CLIP_MARGIN)
+                tile_segments[crossing[kept]] = clipped
+                if len(clipped) < len(crossing): # segments are drawn in order, keep it
+                    visible = np.ones(len(binned), dtype=bool)
+                    visible[crossing[~kept]] = False
+                    tile_segments = tile_segments[visible]
+                    tile_colors = tile_colors[visible]
+            if len(tile_segments):
+                self._rasterizer.draw_segments(tile_surface, tile_segments, tile_colors,
+                                               (left + x, top + y))
+
+        if self._executor is None:
+            for tile in tiles:
+                draw_tile(tile)
+        else:
+            for _ in self._executor.map(draw_tile, tiles): # raises the errors of the workers
+                pass
+        surface.blits([(tile_surface, rect, rect.move(-x, -y))
+                       for tile_surface, _, (x, y), rect in tiles], doreturn=False)
+
+    def close(self) -> None:
+        """Stops the worker threads once they are done."""
+        if self._executor is not None:
+            self._executor.shutdown()
@@ -0,0 +1,64 @@
+"""Adapt the resolution the world is drawn at to the time frames take.
+
+Classes:
+    ResolutionScaler
+"""
+
+from config import (RENDER_SCALE_MIN, RENDER_SCALE_STEP, RENDER_SCALE_WINDOW,
+                    RENDER_SCALE_HEADROOM)
+
+__author__ = "Jye-Ming Serres"
+
+
+class ResolutionScaler:
+    """Picks the fraction of the screen's resolution the world is drawn at from recent frames.
+
+    The average drawing time of the last `RENDER_SCALE_WINDOW` frames is compared to a target
+    time. Above the target, the scale goes down by `RENDER_SCALE_STEP`, no lower than
+    `RENDER_SCALE_MIN`. Under `RENDER_SCALE_HEADROOM` times the target, it goes back up by a step,
+    no higher than the native resolution. Between the two, the scale stays the same so that it does
+    not switch back and forth. Frames are averaged in consecutive windows, so the window after a
+    change only measures the new scale.
+
+    Methods:
+        add_frame()
+    """
+
+    def __init__(self, target_time: float) -> None:
+        """Creates an instance starting at the native resolution.
+
+        Args:
+            target_time: Time (seconds) drawing the world should take.
+        """
+        self._target_time = target_time
+        self._scale = 1.0
+        self._total_time = 0
+        self._frame_count = 0
+
+    @property
+    def scale(self) -> float:
+        """Fraction of the screen's width and height the world is drawn at."""
+        return self._scale
+
+    @property
+    def target_time(self) -> float:
+        """Time (seconds) drawing the world should take."""
+        return self._target_time
+
+    def add_frame(self, frame_time: float) -> None:
+        """Accounts for the time a frame took to draw and changes the scale if needed.
+
+        Args:
+            frame_time: Time (seconds) drawing the world took at the current scale.
+        """
+        self._total_time += frame_time
+        self._frame_count += 1
+        if self._frame_count < RENDER_SCALE_WINDOW:
+            return
+        average = self._total_time/self._frame_count
+        if average > self._target_time:
+            self._scale = max(self._scale - RENDER_SCALE_STEP, RENDER_SCALE_MIN)
+        elif average < self._target_time*RENDER_SCALE_HEADROOM:
+            self._scale = min(self._scale + RENDER_SCALE_STEP, 1.0)
+        self._total_time = 0
+        self._frame_count = 0
@@ -0,0 +1,232 @@
+"""Render frames of the world for other local processes.
+
+Clients send batches of camera poses and receive one rendered frame per pose, in order. Requests
+are read and responses written by background threads, so a client can send many batches without
+waiting for the previous frames (pipelining).
+
+Protocol (little-endian):
+    Request: a batch starts with the number of poses (uint32) followed by 10 float64 per pose:
+        aperture (x, y, z), image_x (x, y, z), image_y (x, y, z) and focal length. A batch of 0
+        poses ends the session, as does a batch with a malformed pose (a coordinate that is not
+        finite, image axes that are zero or parallel, or a focal length that is not positive).
+    Response: for each pose, the frame's width and height (2 uint32) followed by its pixels in RGB
+        order, row by row.
+
+Classes:
+    FramedStreamSink
+    RenderServer
+"""
+
+import os
+import queue
+import socket
+import struct
+import threading
+from collections.abc import Callable
+from typing import BinaryIO
+
+import numpy as np
+from pygame.surface import Surface
+
+from config import SERVER_QUEUE_SIZE
+from display import Display
+from exporter import FrameExporter, FrameSink
+from world import World
+
+__author__ = "Jye-Ming Serres"
+
+
+POSE_FORMAT = struct.Struct("<10d")
+COUNT_FORMAT = struct.Struct("<I")
+FRAME_HEADER_FORMAT = struct.Struct("<II")
+
+
+class FramedStreamSink(FrameSink):
+    """Writes each frame to a binary stream, preceded by its width and height."""
+
+    def __init__(self, stream: BinaryIO) -> None:
+        """Creates an instance writing to a stream.
+
+        Args:
+            stream: Where frames are written.
+        """
+        self._stream = stream
+
+    def write(self, index: int, frame: bytes, size: tuple[int, int]) -> None:
+        self._stream.write(FRAME_HEADER_FORMAT.pack(*size))
+        self._stream.write(frame)
+        self._stream.flush()
+
+
+class RenderServer:
+    """Renders the world through camera poses requested by other processes.
+
+    The world is not stepped, every pose is rendered against its current state. The world's camera
+    is moved to each requested pose.
+
+    Methods:
+        serve_stream()
+        serve_unix_socket()
+    """
+
+    def __init__(self, world: World, display: Display, surface: Surface) -> None:
+        """Creates an instance rendering off-screen.
+
+        Args:
+            world: Model of the simulation.
+            display: Draws on `surface`.
+            surface: The off-screen surface frames are copied from.
+        """
+        self._world = world
+        self._display = display
+        self._surface = surface
+
+    def serve_stream(self, reader: BinaryIO, writer: BinaryIO,
+                     interrupt: Callable[[], None] | None = None) -> None:
+        """Answers requests until the reader is exhausted or a batch of 0 poses is received.
+
+        The session also ends, without raising, when frames can no longer be written because the
+        client left. The reader thread is stopped before returning in every case.
+
+        Args:
+            reader: Where requests are read from.
+            writer: Where frames are written to.
+            interrupt: Called when the session ends before the reader is exhausted, to unblock a
+                read in progress (for instance by shutting a socket down).
+
+        Raises:
+            RuntimeError: If writing a frame failed for another reason than the stream.
+        """
+        requests = queue.Queue(maxsize=SERVER_QUEUE_SIZE)
+        stopping = threading.Event()
+        reader_thread = threading.Thread(target=self._read_requests,
+                                         args=(reader, requests, stopping),
+                                         name="request-reader", daemon=True)
+        reader_thread.start()
+        exporter = FrameExporter(self._surface, FramedStreamSink(writer), SERVER_QUEUE_SIZE)
+        camera = self._world.camera
+        poses = []
+        try:
+            try:
+                while (poses := requests.get()) is not None:
+                    for pose in poses:
+                        camera.set_pose(pose[0:3], pose[3:6], pose[6:9], focal_length=pose[9])
+                        self._display.draw(self._world, 0)
+                        exporter.submit()
+            finally:
+                exporter.close()
+        except RuntimeError as error:
+            if not isinstance(error.__cause__, OSError):
+                raise
+            # the client left without ending its session
+        finally:
+            if poses is not None: # the reader thread has not ended yet
+                stopping.set()
+                if interrupt is not None:
+                    interrupt()
+                while requests.get() is not None: # makes room for the reader thread to end
+                    pass
+            reader_thread.join()
+
+    def serve_unix_socket(self, path: str) -> None:
+        """Listens on a Unix socket and serves one connection at a time, forever.
+
+        Args:
+            path: Path of the socket file. Replaced if it already exists.
+        """
+        if os.path.exists(path):
+            os.remove(path)
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as listener:
+            listener.bind(path)
+            listener.listen()
+            while True:
+                connection, _ = listener.accept()
+                try:
+                    with connection, connection.makefile("rb") as reader, \
+                            connection.makefile("wb") as writer:
+                        self.serve_stream(reader, writer, lambda: _shutdown(connection))
+                except OSError:
+                    pass # the client left without ending its session
+
+    @staticmethod
+    def _read_requests(reader: BinaryIO, requests: queue.Queue, stopping: threading.Event) -> None:
+        """Body of the reader thread. Parses batches of poses until the session ends.
+
+        Args:
+            reader: Where requests are read from.
+            requests: Receives a list of poses per batch, then `None`.
+            stopping: Set when the session ended early, no more batches are read then.
+        """
+        try:
+            while not stopping.is_set() and \
+                    (header := _read_exact(reader, COUNT_FORMAT.size)) is not None:
+                (count,) = COUNT_FORMAT.unpack(header)
+                if count == 0:
+                    break
+                data = _read_exact(reader, count*POSE_FORMAT.size)
+                if data is None:
+                    break
+                poses = np.frombuffer(data, dtype="<f8").reshape(count, 10)
+                if not _are_valid_poses(poses):
+                    break
+                requests.put(poses.tolist())
+        except (OSError, ValueError):
+            pass # the connection was lost or closed
+        finally:
+            requests.put(None)
+
+
+def _are_valid_poses(poses: np.ndarray) -> bool:
+    """Checks that poses can be given to `Camera.set_pose()`.
+
+    Args:
+        poses: Aperture, image_x, image_y and focal length of each pose. Shape (n, 10).
+
+    Returns:
+        Whether every coordinate is finite, every pair of image axes is neither zero nor parallel,
+        and every focal length is positive.
+    """
+    if not np.isfinite(poses).all() or not (poses[:, 9] > 0).all():
+        return False
+
+    # The image axes are orthonormalized as the camera does, neither may end up of length zero.
+
+    image_x = poses[:, 3:6]
+    image_y = poses[:, 6:9]
+    lengths = np.sqrt((image_x**2).sum(axis=1, keepdims=True))
+    if not (lengths > 0).all():
+        return False
+    image_x = image_x/lengths
+    image_y = image_y - (image_y*image_x).sum(axis=1, keepdims=True)*image_x
+    return bool(((image_y**2).sum(axis=1) > 0).all())
+
+
+def _shutdown(connection: socket.socket) -> None:
+    """Shuts both directions of a connection down, which unblocks a thread reading from it.
+
+    Args:
+        connection: The connection, possibly already closed by the peer.
+    """
+    try:
+        connection.shutdown(socket.SHUT_RDWR)
+    except OSError:
+        pass # already disconnected
+
+
+def _read_exact(reader: BinaryIO, size: int) -> bytes | None:
+    """Reads exactly a number of bytes.
+
+    Args:
+        reader: Where bytes are read from.
+        size: Number of bytes to read.
+
+    Returns:
+        The bytes, or `None` if the stream ended before.
+    """
+    data = b""
+    while len(data) < size:
+        chunk = reader.read(size - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
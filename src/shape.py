@@ -4,35 +4,41 @@ Classes:
     Shape
 """
 
+import sys
+
+import numpy as np
 from pygame import Vector3
 
 from config import Color
+from mesh import Mesh
+from node import Node
 
 __author__ = "Jye-Ming Serres"
 
 
-class Shape:
+class Shape(Node):
     """Parent class for shapes within the simulation.
 
     Generic manipulations of shapes should be based on this definition.
 
-    Attributes:
-        rectilinear_velocity (:obj:`pygame.Vector3`): The shape's current velocity in 
-            pixels/seconds.
-        angular_velocity (:obj:`pygame.Vector3`): The shape's current counterclockwise angular 
-            velocity in degrees/seconds around the x, y, z axis.
+    The shape's position, orientation and velocities are handled by `Node`, possibly relative to a
+    group. Its geometry is a `Mesh` in local space which can be shared between shapes, and world
+    space vertices are only derived when requested after the shape or one of its groups moved.
+    Instances are slotted to keep very large worlds compact.
 
     Methods:
-        update()
-        move()
-        rotate()
+        from_mesh()
+        front_edges()
     """
 
+    __slots__ = ("_mesh", "_color", "_vertices", "_vertices_version")
+
     def __init__(self, center: Vector3,
                  vertices: list[Vector3],
                  edges: list[tuple[int, int]],
-                 color: Color) -> None:
-        """Creates an instance from specified vertices, edges and shape color.
+                 color: Color,
+                 faces: list[tuple[int, ...]] = None) -> None:
+        """Creates an instance from specified vertices, edges, shape color and optional faces.
 
         args:
             center: Used as a basis for some manipulations like rotation.
@@ -40,64 +46,102 @@ class Shape:
             edges: Association table between vertices. Each tuple (an edge) contains the index of 
                 both connecting vertices within the list of 3D vectors.
             color: Color used to draw the shape.
+            faces: Each tuple (a face) contains the index of its vertices, counterclockwise when 
+                seen from outside the shape. Without faces, every edge is considered in front.
+        """
+        local_vertices = np.array(vertices, dtype=float).reshape(-1, 3) - tuple(center)
+        self._init(Mesh(local_vertices, edges, faces), center, color)
+
+    @classmethod
+    def from_mesh(cls, mesh: Mesh, center: Vector3, color: Color) -> "Shape":
+        """Creates an instance sharing an existing mesh.
+
+        Args:
+            mesh: Vertices, edges and faces relative to the shape's center.
+            center: Used as a basis for some manipulations like rotation.
+            color: Color used to draw the shape.
+
+        Returns:
+            The shape.
         """
-        self._center = center
-        self._vertices = vertices
-        self._edges = edges
+        shape = cls.__new__(cls)
+        shape._init(mesh, center, color)
+        return shape
+
+    def _init(self, mesh: Mesh, center: Vector3, color: Color) -> None:
+        """Initializes the instance from its mesh. Shared by every constructor."""
+        self._init_node(center)
+        self._mesh = mesh
         self._color = color
+        self._vertices = None # allocated when first requested
+        self._vertices_version = -1
 
-        self.rectilinear_velocity = Vector3(0, 0, 0)
-        self.angular_velocity = Vector3(0, 0, 0)
+    @property
+    def mesh(self) -> Mesh:
+        """Vertices, edges and faces relative to the shape's center. Can be shared."""
+        return self._mesh
 
     @property
-    def center(self) -> Vector3:
-        """Used as a basis for some manipulations like rotation."""
-        return self._center
+    def nbytes(self) -> int:
+        """Bytes used by the shape itself, excluding its shared mesh and its kinematics row."""
+        size = sys.getsizeof(self)
+        if self._world_transform is not None:
+            size += sum(sys.getsizeof(array) for array in self._world_transform)
+        if self._vertices is not None:
+            size += sys.getsizeof(self._vertices)
+        return size
 
     @property
-    def vertices(self) -> list[Vector3]:
-        """List of 3D vectors representing each the coordinates of a vertex."""
+    def vertices(self) -> np.ndarray:
+        """Array of the coordinates of each vertex in world space. Shape (n, 3). (read only)"""
+        version = self.transform_version
+        if version != self._vertices_version:
+            if self._vertices is None:
+                self._vertices = np.empty(self._mesh.vertices.shape, dtype=np.float32)
+            orientation, position = self.world_transform
+            np.matmul(self._mesh.vertices, orientation.T, out=self._vertices)
+            self._vertices += position
+            self._vertices_version = version
         return self._vertices
 
     @property
-    def edges(self) -> list[tuple[int, int]]:
-        """Association table between vertices. 
-        
-        Each tuple (an edge) contains the index of the connecting vertices within the shape's list 
+    def edges(self) -> np.ndarray:
+        """Association table between vertices. Shape (e, 2).
+
+        Each row (an edge) contains the index of the connecting vertices within the shape's array 
         of vertices.
         """
-        return self._edges
+        return self._mesh.edges
+
+    @property
+    def faces(self) -> list[tuple[int, ...]] | None:
+        """Each tuple (a face) contains the index of its vertices, counterclockwise when seen from 
+        outside the shape. `None` if the shape was not defined with faces."""
+        return self._mesh.faces
 
     @property
     def color(self) -> Color:
         """Color used to draw the shape."""
         return self._color
 
-    def update(self, dt: float) -> None:
-        """Applies the shape's rectilinear and angular velocity accross a time interval.
+    def front_edges(self, viewpoint: Vector3) -> np.ndarray:
+        """Finds the edges belonging to at least one face turned towards a viewpoint.
 
-        Args:
-            dt: Delta time (seconds).   
-        """
-        self.move(self.rectilinear_velocity * dt)
-        self.rotate(self.angular_velocity * dt)
-
-    def move(self, displacement: Vector3) -> None:
-        displacement = displacement.copy() # Shallow copy
-        for vertex in self._vertices:
-            vertex += displacement
-        self._center += displacement
-
-    def rotate(self, angular_displacement: Vector3) -> None:
-        """Rotates the shape around its center.
+        For a convex shape, the other edges are hidden behind the shape. The test is done for all 
+        faces at once in the shape's local space.
 
         Args:
-            angular_displacement: Counterclockwise rotation in degrees around the x, y, z axis.
+            viewpoint: Position from which the shape is seen.
+
+        Returns:
+            Boolean mask over the shape's edges. Every edge is in front if the shape has no faces.
         """
-        center_pos = self._center.copy() # Shallow copy for the second move() call.
-        self.move(-center_pos)
-        for vertex in self._vertices:
-            vertex.rotate_x_ip(angular_displacement.x)
-            vertex.rotate_y_ip(angular_displacement.y)
-            vertex.rotate_z_ip(angular_displacement.z)
-        self.move(center_pos)
+        mesh = self._mesh
+        if mesh.faces is None:
+            return np.ones(len(mesh.edges), dtype=bool)
+        orientation, position = self.world_transform
+        local_viewpoint = (np.asarray(viewpoint) - position) @ orientation
+        facing = mesh.face_normals @ local_viewpoint > mesh.face_offsets
+        # The last element stands for edges without faces which are always drawn.
+        facing = np.append(facing, True)
+        return facing[mesh.edge_faces].any(axis=1)
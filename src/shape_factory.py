@@ -5,15 +5,22 @@ Classes:
 """
 
 from collections.abc import Callable
+from functools import lru_cache
 
 from pygame import Vector3
 
-from config import Color, GOLDEN_RATIO
+from config import Color, GOLDEN_RATIO, MESH_CACHE_SIZE, SUBDIVISION_CACHE_SIZE
+from mesh import Mesh
 from shape import Shape
 
 __author__ = "Jye-Ming Serres"
 
 
+# Vertices, edges and faces of a shape. Faces list their vertices counterclockwise when seen from
+# outside the shape.
+MeshData = tuple[list[Vector3], list[tuple[int, int]], list[tuple[int, ...]]]
+
+
 class ShapeFactory:
     """Platonic solid maker using factory design pattern.
 
@@ -27,230 +34,380 @@ class ShapeFactory:
         make_shape()
     """
 
-    def make_shape(self, shape_name: str, pos: Vector3, radius: float, color: Color) -> Shape:
+    def make_shape(self, shape_name: str, pos: Vector3, radius: float, color: Color,
+                   subdivisions: int = 0) -> Shape:
         """Makes a shape according its name, center position, color and circumscribed sphere radius.
 
         shape_name options: "tetrahedron", "cube", "octahedron", "dodecahedron", "icosahedron".
 
+        With subdivisions, the solid becomes a geodesic polyhedron: every face is split into
+        triangles whose vertices lie on the circumscribed sphere. For instance, an icosahedron
+        subdivided N times is an icosphere with 20*4^N faces.
+
         Args:
             shape_name: Name of the shape to create.
             pos: Shape's center position.
             radius: Shape's circumscribed sphere radius.
             color: Shape's display color.
+            subdivisions: Number of times the faces are subdivided.
 
         Returns:
             The shape.
         """
-        maker = self._get_maker(shape_name)
-        shape = maker(color)
-        max_vect = max(shape.vertices, key=lambda vect: vect.length_squared())
-        scale_factor = radius/max_vect.length()
-        for vertex in shape.vertices:
-            vertex *= scale_factor
-        shape.move(pos)
-        return shape
+        return Shape.from_mesh(_get_mesh(shape_name, radius, subdivisions), pos, color)
 
-    def _get_maker(self, shape_name: str) -> Callable[[Color], Shape]:
-        """Fetches the right maker for the specified shape name.
 
-        shape_name options: "tetrahedron", "cube", "octahedron", "dodecahedron", "icosahedron". 
+@lru_cache(maxsize=MESH_CACHE_SIZE)
+def _get_mesh(shape_name: str, radius: float, subdivisions: int = 0) -> Mesh:
+    """Builds the mesh of a shape centered on the origin, or fetches it if it was already built.
 
-        Args:
-            shape_name: Name of the shape to create.
+    Shapes of the same kind, subdivision level and size share their mesh, whichever factory made
+    them.
 
-        Returns:
-            A `Callable` that takes in a color and returns a shape.
+    Args:
+        shape_name: Name of the shape to create.
+        radius: Shape's circumscribed sphere radius.
+        subdivisions: Number of times the faces are subdivided.
 
-        Raises:
-            ValueError: If the specified shape name is not an available option.
-        """
-        maker = None
-        match shape_name:
-            case "tetrahedron":
-                maker = self._make_tetrahedron
-            case "cube":
-                maker = self._make_cube
-            case "octahedron":
-                maker = self._make_octahedron
-            case "dodecahedron":
-                maker = self._make_dodecahedron
-            case "icosahedron":
-                maker = self._make_icosahedron
-            case _:
-                raise ValueError(f"Unknown shape name : '{shape_name}'")
-        return maker
-
-    def _make_tetrahedron(self, color: Color) -> Shape:
-        vertices = [
-            Vector3(-1, -1, 1),
-            Vector3(-1, 1, -1),
-            Vector3(1, -1, -1),
-            Vector3(1, 1, 1),
-            ]
-        edges = [
-            (0, 1),
-            (0, 2),
-            (0, 3),
-            (1, 2),
-            (1, 3),
-            (2, 3),
-            ]
-        return Shape(Vector3(0, 0, 0), vertices, edges, color)
-
-    def _make_cube(self, color: Color) -> Shape:
-        vertices = [
-            Vector3(-1, -1, -1),
-            Vector3(-1, -1, 1),
-            Vector3(-1, 1, -1),
-            Vector3(-1, 1, 1),
-            Vector3(1, -1, -1),
-            Vector3(1, -1, 1),
-            Vector3(1, 1, -1),
-            Vector3(1, 1, 1),
-            ]
-        edges = [
-            (0, 1),
-            (0, 2),
-            (0, 4),
-            (1, 3),
-            (1, 5),
-            (2, 3),
-            (2, 6),
-            (3, 7),
-            (4, 5),
-            (4, 6),
-            (5, 7),
-            (6, 7),
-            ]
-        return Shape(Vector3(0, 0, 0), vertices, edges, color)
-
-    def _make_octahedron(self, color: Color) -> Shape:
-        vertices = [
-            Vector3(-1, 0, 0),
-            Vector3(0, -1, 0),
-            Vector3(0, 0, -1),
-            Vector3(0, 0, 1),
-            Vector3(0, 1, 0),
-            Vector3(1, 0, 0),
-            ]
-        edges = [
-            (0, 1),
-            (0, 2),
-            (0, 3),
-            (0, 4),
-            (1, 2),
-            (1, 3),
-            (1, 5),
-            (2, 4),
-            (2, 5),
-            (3, 4),
-            (3, 5),
-            (4, 5),
-            ]
-        return Shape(Vector3(0, 0, 0), vertices, edges, color)
-
-    def _make_dodecahedron(self, color: Color) -> Shape:
-        vertices = [
-            Vector3(-GOLDEN_RATIO, 0, -1/GOLDEN_RATIO),
-            Vector3(-GOLDEN_RATIO, 0, 1/GOLDEN_RATIO),
-            Vector3(-1, -1, -1),
-            Vector3(-1, -1, 1),
-            Vector3(-1, 1, -1),
-            Vector3(-1, 1, 1),
-            Vector3(-1/GOLDEN_RATIO, -GOLDEN_RATIO, 0),
-            Vector3(-1/GOLDEN_RATIO, GOLDEN_RATIO, 0),
-            Vector3(0, -1/GOLDEN_RATIO, -GOLDEN_RATIO),
-            Vector3(0, -1/GOLDEN_RATIO, GOLDEN_RATIO),
-            Vector3(0, 1/GOLDEN_RATIO, -GOLDEN_RATIO),
-            Vector3(0, 1/GOLDEN_RATIO, GOLDEN_RATIO),
-            Vector3(1/GOLDEN_RATIO, -GOLDEN_RATIO, 0),
-            Vector3(1/GOLDEN_RATIO, GOLDEN_RATIO, 0),
-            Vector3(1, -1, -1),
-            Vector3(1, -1, 1),
-            Vector3(1, 1, -1),
-            Vector3(1, 1, 1),
-            Vector3(GOLDEN_RATIO, 0, -1/GOLDEN_RATIO),
-            Vector3(GOLDEN_RATIO, 0, 1/GOLDEN_RATIO),
-            ]
-        edges = [
-            (0, 1),
-            (0, 2),
-            (0, 4),
-            (1, 3),
-            (1, 5),
-            (2, 6),
-            (2, 8),
-            (3, 6),
-            (3, 9),
-            (4, 7),
-            (4, 10),
-            (5, 7),
-            (5, 11),
-            (6, 12),
-            (7, 13),
-            (8, 10),
-            (8, 14),
-            (9, 11),
-            (9, 15),
-            (10, 16),
-            (11, 17),
-            (12, 14),
-            (12, 15),
-            (13, 16),
-            (13, 17),
-            (14, 18),
-            (15, 19),
-            (16, 18),
-            (17, 19),
-            (18, 19),
-            ]
-        return Shape(Vector3(0, 0, 0), vertices, edges, color)
-
-    def _make_icosahedron(self, color: Color) -> Shape:
-        vertices = [
-            Vector3(-GOLDEN_RATIO, 0, -1),
-            Vector3(-GOLDEN_RATIO, 0, 1),
-            Vector3(-1, -GOLDEN_RATIO, 0),
-            Vector3(-1, GOLDEN_RATIO, 0),
-            Vector3(0, -1, -GOLDEN_RATIO),
-            Vector3(0, -1, GOLDEN_RATIO),
-            Vector3(0, 1, -GOLDEN_RATIO),
-            Vector3(0, 1, GOLDEN_RATIO),
-            Vector3(1, -GOLDEN_RATIO, 0),
-            Vector3(1, GOLDEN_RATIO, 0),
-            Vector3(GOLDEN_RATIO, 0, -1),
-            Vector3(GOLDEN_RATIO, 0, 1),
-            ]
-        edges = [
-            (0, 1),
-            (0, 2),
-            (0, 3),
-            (0, 4),
-            (0, 6),
-            (1, 2),
-            (1, 3),
-            (1, 5),
-            (1, 7),
-            (2, 4),
-            (2, 5),
-            (2, 8),
-            (3, 6),
-            (3, 7),
-            (3, 9),
-            (4, 6),
-            (4, 8),
-            (4, 10),
-            (5, 7),
-            (5, 8),
-            (5, 11),
-            (6, 9),
-            (6, 10),
-            (7, 9),
-            (7, 11),
-            (8, 10),
-            (8, 11),
-            (9, 10),
-            (9, 11),
-            (10, 11),
-            ]
-        return Shape(Vector3(0, 0, 0), vertices, edges, color)
+    Returns:
+        The shared mesh.
+    """
+    vertices, edges, faces = _get_subdivided(shape_name, subdivisions)
+    max_vect = max(vertices, key=lambda vect: vect.length_squared())
+    scale_factor = radius/max_vect.length()
+    vertices = [vertex*scale_factor for vertex in vertices]
+    return Mesh(vertices, edges, faces)
+
+
+@lru_cache(maxsize=SUBDIVISION_CACHE_SIZE)
+def _get_subdivided(shape_name: str, subdivisions: int) -> MeshData:
+    """Subdivides the faces of a shape centered on the origin, or fetches it if it was already
+    subdivided.
+
+    Each level is built from the previous one, so building a level also caches the levels
+    below it. The first level splits faces with more than three vertices into triangles around
+    their center. Every level then splits each triangle into four through the midpoint of its
+    edges. Midpoints are shared between the two faces of an edge. New vertices are pushed onto
+    the circumscribed sphere.
+
+    Args:
+        shape_name: Name of the shape to subdivide.
+        subdivisions: Number of times the faces are subdivided.
+
+    Returns:
+        The vertices, edges and faces of the subdivided shape, at the scale of its maker.
+
+    Raises:
+        ValueError: If the specified shape name is not an available option or the number of
+            subdivisions is negative.
+    """
+    if subdivisions < 0:
+        raise ValueError(f"Negative number of subdivisions : {subdivisions}")
+    if subdivisions == 0:
+        return _get_maker(shape_name)()
+
+    vertices, _, faces = _get_subdivided(shape_name, subdivisions - 1)
+    radius = max(vertex.length() for vertex in vertices)
+    vertices = list(vertices)
+
+    triangles = []
+    for face in faces:
+        if len(face) == 3:
+            triangles.append(face)
+        else:
+            center = sum((vertices[i] for i in face), Vector3())
+            vertices.append(center*(radius/center.length()))
+            triangles.extend((face[i - 1], face[i], len(vertices) - 1)
+                             for i in range(len(face)))
+
+    midpoints = {}
+    def midpoint(a: int, b: int) -> int:
+        key = (a, b) if a < b else (b, a)
+        if key not in midpoints:
+            middle = vertices[a] + vertices[b]
+            vertices.append(middle*(radius/middle.length()))
+            midpoints[key] = len(vertices) - 1
+        return midpoints[key]
+
+    new_faces = []
+    for a, b, c in triangles:
+        ab, bc, ca = midpoint(a, b), midpoint(b, c), midpoint(c, a)
+        new_faces.extend(((a, ab, ca), (ab, b, bc), (ca, bc, c), (ab, bc, ca)))
+
+    edges = {}
+    for face in new_faces:
+        for i, vertex in enumerate(face):
+            edges.setdefault(frozenset((face[i - 1], vertex)), (face[i - 1], vertex))
+    return vertices, list(edges.values()), new_faces
+
+
+def _get_maker(shape_name: str) -> Callable[[], MeshData]:
+    """Fetches the right maker for the specified shape name.
+
+    shape_name options: "tetrahedron", "cube", "octahedron", "dodecahedron", "icosahedron". 
+
+    Args:
+        shape_name: Name of the shape to create.
+
+    Returns:
+        A `Callable` that returns the vertices, edges and faces of the shape centered on the 
+            origin.
+
+    Raises:
+        ValueError: If the specified shape name is not an available option.
+    """
+    maker = None
+    match shape_name:
+        case "tetrahedron":
+            maker = _make_tetrahedron
+        case "cube":
+            maker = _make_cube
+        case "octahedron":
+            maker = _make_octahedron
+        case "dodecahedron":
+            maker = _make_dodecahedron
+        case "icosahedron":
+            maker = _make_icosahedron
+        case _:
+            raise ValueError(f"Unknown shape name : '{shape_name}'")
+    return maker
+
+
+def _make_tetrahedron() -> MeshData:
+    vertices = [
+        Vector3(-1, -1, 1),
+        Vector3(-1, 1, -1),
+        Vector3(1, -1, -1),
+        Vector3(1, 1, 1),
+        ]
+    edges = [
+        (0, 1),
+        (0, 2),
+        (0, 3),
+        (1, 2),
+        (1, 3),
+        (2, 3),
+        ]
+    faces = [
+        (0, 1, 2),
+        (0, 3, 1),
+        (0, 2, 3),
+        (1, 3, 2),
+        ]
+    return vertices, edges, faces
+
+
+def _make_cube() -> MeshData:
+    vertices = [
+        Vector3(-1, -1, -1),
+        Vector3(-1, -1, 1),
+        Vector3(-1, 1, -1),
+        Vector3(-1, 1, 1),
+        Vector3(1, -1, -1),
+        Vector3(1, -1, 1),
+        Vector3(1, 1, -1),
+        Vector3(1, 1, 1),
+        ]
+    edges = [
+        (0, 1),
+        (0, 2),
+        (0, 4),
+        (1, 3),
+        (1, 5),
+        (2, 3),
+        (2, 6),
+        (3, 7),
+        (4, 5),
+        (4, 6),
+        (5, 7),
+        (6, 7),
+        ]
+    faces = [
+        (0, 1, 3, 2),
+        (0, 4, 5, 1),
+        (0, 2, 6, 4),
+        (1, 5, 7, 3),
+        (2, 3, 7, 6),
+        (4, 6, 7, 5),
+        ]
+    return vertices, edges, faces
+
+
+def _make_octahedron() -> MeshData:
+    vertices = [
+        Vector3(-1, 0, 0),
+        Vector3(0, -1, 0),
+        Vector3(0, 0, -1),
+        Vector3(0, 0, 1),
+        Vector3(0, 1, 0),
+        Vector3(1, 0, 0),
+        ]
+    edges = [
+        (0, 1),
+        (0, 2),
+        (0, 3),
+        (0, 4),
+        (1, 2),
+        (1, 3),
+        (1, 5),
+        (2, 4),
+        (2, 5),
+        (3, 4),
+        (3, 5),
+        (4, 5),
+        ]
+    faces = [
+        (0, 2, 1),
+        (0, 1, 3),
+        (0, 4, 2),
+        (0, 3, 4),
+        (1, 2, 5),
+        (1, 5, 3),
+        (2, 4, 5),
+        (3, 5, 4),
+        ]
+    return vertices, edges, faces
+
+
+def _make_dodecahedron() -> MeshData:
+    vertices = [
+        Vector3(-GOLDEN_RATIO, 0, -1/GOLDEN_RATIO),
+        Vector3(-GOLDEN_RATIO, 0, 1/GOLDEN_RATIO),
+        Vector3(-1, -1, -1),
+        Vector3(-1, -1, 1),
+        Vector3(-1, 1, -1),
+        Vector3(-1, 1, 1),
+        Vector3(-1/GOLDEN_RATIO, -GOLDEN_RATIO, 0),
+        Vector3(-1/GOLDEN_RATIO, GOLDEN_RATIO, 0),
+        Vector3(0, -1/GOLDEN_RATIO, -GOLDEN_RATIO),
+        Vector3(0, -1/GOLDEN_RATIO, GOLDEN_RATIO),
+        Vector3(0, 1/GOLDEN_RATIO, -GOLDEN_RATIO),
+        Vector3(0, 1/GOLDEN_RATIO, GOLDEN_RATIO),
+        Vector3(1/GOLDEN_RATIO, -GOLDEN_RATIO, 0),
+        Vector3(1/GOLDEN_RATIO, GOLDEN_RATIO, 0),
+        Vector3(1, -1, -1),
+        Vector3(1, -1, 1),
+        Vector3(1, 1, -1),
+        Vector3(1, 1, 1),
+        Vector3(GOLDEN_RATIO, 0, -1/GOLDEN_RATIO),
+        Vector3(GOLDEN_RATIO, 0, 1/GOLDEN_RATIO),
+        ]
+    edges = [
+        (0, 1),
+        (0, 2),
+        (0, 4),
+        (1, 3),
+        (1, 5),
+        (2, 6),
+        (2, 8),
+        (3, 6),
+        (3, 9),
+        (4, 7),
+        (4, 10),
+        (5, 7),
+        (5, 11),
+        (6, 12),
+        (7, 13),
+        (8, 10),
+        (8, 14),
+        (9, 11),
+        (9, 15),
+        (10, 16),
+        (11, 17),
+        (12, 14),
+        (12, 15),
+        (13, 16),
+        (13, 17),
+        (14, 18),
+        (15, 19),
+        (16, 18),
+        (17, 19),
+        (18, 19),
+        ]
+    faces = [
+        (0, 2, 6, 3, 1),
+        (0, 1, 5, 7, 4),
+        (0, 4, 10, 8, 2),
+        (1, 3, 9, 11, 5),
+        (2, 8, 14, 12, 6),
+        (3, 6, 12, 15, 9),
+        (4, 7, 13, 16, 10),
+        (5, 11, 17, 13, 7),
+        (8, 10, 16, 18, 14),
+        (9, 15, 19, 17, 11),
+        (12, 14, 18, 19, 15),
+        (13, 17, 19, 18, 16),
+        ]
+    return vertices, edges, faces
+
+
+def _make_icosahedron() -> MeshData:
+    vertices = [
+        Vector3(-GOLDEN_RATIO, 0, -1),
+        Vector3(-GOLDEN_RATIO, 0, 1),
+        Vector3(-1, -GOLDEN_RATIO, 0),
+        Vector3(-1, GOLDEN_RATIO, 0),
+        Vector3(0, -1, -GOLDEN_RATIO),
+        Vector3(0, -1, GOLDEN_RATIO),
+        Vector3(0, 1, -GOLDEN_RATIO),
+        Vector3(0, 1, GOLDEN_RATIO),
+        Vector3(1, -GOLDEN_RATIO, 0),
+        Vector3(1, GOLDEN_RATIO, 0),
+        Vector3(GOLDEN_RATIO, 0, -1),
+        Vector3(GOLDEN_RATIO, 0, 1),
+        ]
+    edges = [
+        (0, 1),
+        (0, 2),
+        (0, 3),
+        (0, 4),
+        (0, 6),
+        (1, 2),
+        (1, 3),
+        (1, 5),
+        (1, 7),
+        (2, 4),
+        (2, 5),
+        (2, 8),
+        (3, 6),
+        (3, 7),
+        (3, 9),
+        (4, 6),
+        (4, 8),
+        (4, 10),
+        (5, 7),
+        (5, 8),
+        (5, 11),
+        (6, 9),
+        (6, 10),
+        (7, 9),
+        (7, 11),
+        (8, 10),
+        (8, 11),
+        (9, 10),
+        (9, 11),
+        (10, 11),
+        ]
+    faces = [
+        (0, 2, 1),
+        (0, 1, 3),
+        (0, 4, 2),
+        (0, 3, 6),
+        (0, 6, 4),
+        (1, 2, 5),
+        (1, 7, 3),
+        (1, 5, 7),
+        (2, 4, 8),
+        (2, 8, 5),
+        (3, 9, 6),
+        (3, 7, 9),
+        (4, 6, 10),
+        (4, 10, 8),
+        (5, 11, 7),
+        (5, 8, 11),
+        (6, 9, 10),
+        (7, 11, 9),
+        (8, 10, 11),
+        (9, 11, 10),
+        ]
+    return vertices, edges, faces
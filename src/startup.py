@@ -0,0 +1,110 @@
+"""Measure and shorten the time between launching the program and its first frame.
+
+Classes:
+    StartupProfile
+
+Functions:
+    load_font()
+"""
+
+import json
+import os
+import sys
+import time
+
+import pygame
+from pygame.font import Font
+
+__author__ = "Jye-Ming Serres"
+
+
+class StartupProfile:
+    """Records how long each phase of the startup takes.
+
+    Phases are consecutive: each one lasts from the end of the previous one (or the creation of the
+    profile) until it is marked.
+
+    Methods:
+        mark()
+        report()
+    """
+
+    def __init__(self, start: float = None) -> None:
+        """Creates an instance starting now or at a given time.
+
+        Args:
+            start: `time.perf_counter()` value at which the first phase started.
+        """
+        self._start = time.perf_counter() if start is None else start
+        self._last = self._start
+        self._phases = []
+
+    @property
+    def phases(self) -> list[tuple[str, float]]:
+        """Name and duration (seconds) of each phase marked so far, in order."""
+        return list(self._phases)
+
+    @property
+    def total(self) -> float:
+        """Time (seconds) from the start until the last marked phase ended."""
+        return self._last - self._start
+
+    def mark(self, name: str) -> None:
+        """Ends the current phase.
+
+        Args:
+            name: Name of the phase that just ended.
+        """
+        now = time.perf_counter()
+        self._phases.append((name, now - self._last))
+        self._last = now
+
+    def report(self, file=sys.stderr) -> None:
+        """Prints the duration of each phase and the total.
+
+        Args:
+            file: Where the report is printed.
+        """
+        width = max((len(name) for name, _ in self._phases), default=0)
+        for name, duration in self._phases:
+            print(f"{name:<{width}} {duration*1000:8.1f} ms", file=file)
+        print(f"{'total':<{width}} {self.total*1000:8.1f} ms", file=file)
+
+
+def load_font(name: str, size: int, cache_path: str = None) -> Font:
+    """Loads a system font, optionally remembering where its file is between runs.
+
+    Resolving a system font by name scans every font installed, which can take a noticeable time.
+    With a cache, the scan only happens the first time a name is loaded, or if its file is gone.
+
+    Args:
+        name: Name of the system font, for instance "Verdana".
+        size: Height of the font (pixels).
+        cache_path: JSON file mapping font names to their file. Without one, the font is resolved
+            through `pygame.font.SysFont` as usual.
+
+    Returns:
+        The font, or pygame's default font if no font has this name.
+    """
+    if cache_path is None:
+        return pygame.font.SysFont(name, size)
+
+    cache = {}
+    try:
+        with open(cache_path, encoding="utf-8") as file:
+            cache = json.load(file)
+    except (OSError, ValueError):
+        pass # no cache yet or unreadable, resolved below
+
+    if name in cache and (cache[name] is None or os.path.isfile(cache[name])):
+        path = cache[name]
+    else:
+        path = pygame.font.match_font(name)
+        cache[name] = path
+        try:
+            os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+            with open(cache_path, "w", encoding="utf-8") as file:
+                json.dump(cache, file)
+        except OSError:
+            pass # the font is resolved again next time
+    return Font(path, size)
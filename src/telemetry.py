@@ -0,0 +1,132 @@
+"""Record per-frame performance metrics and export them for offline analysis.
+
+Classes:
+    Telemetry
+"""
+
+import json
+import sys
+import time
+from collections import deque
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+from config import TELEMETRY_CAPACITY
+
+__author__ = "Jye-Ming Serres"
+
+
+class Telemetry:
+    """Keeps the metrics of the most recent frames in a ring buffer.
+
+    A frame starts with its first stage and ends with `end_frame()`. Time spent outside of stages
+    before the first one (like waiting for the next frame) is not part of the frame. Allocations
+    are the net change in the number of memory blocks allocated by the interpreter during the
+    frame.
+
+    Each record holds:
+        frame: Number of the frame since the start of the recording.
+        start: Start of the frame (seconds) since the start of the recording.
+        frame_time: Duration (seconds) of the frame.
+        stages: Name, start (seconds since the start of the recording) and duration (seconds) of
+            each stage, in the order they ended. Stages can be nested.
+        allocated_blocks: Net number of memory blocks allocated during the frame.
+        Any other metric passed to `end_frame()`.
+
+    Methods:
+        stage()
+        end_frame()
+        write_jsonl()
+        write_chrome_trace()
+    """
+
+    def __init__(self, capacity: int = TELEMETRY_CAPACITY) -> None:
+        """Creates an empty instance.
+
+        Args:
+            capacity: Number of frames kept. Older frames are dropped.
+        """
+        self._records = deque(maxlen=capacity)
+        self._origin = time.perf_counter()
+        self._frame_count = 0
+        self._frame_start = None
+        self._stages = []
+        self._allocated_blocks = sys.getallocatedblocks()
+
+    @property
+    def records(self) -> list[dict]:
+        """Metrics of the frames kept, from the oldest to the most recent."""
+        return list(self._records)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Times a stage of the current frame, starting the frame if needed.
+
+        Args:
+            name: Name of the stage.
+        """
+        start = time.perf_counter()
+        if self._frame_start is None:
+            self._frame_start = start
+        try:
+            yield
+        finally:
+            self._stages.append({"name": name, "start": start - self._origin,
+                                 "duration": time.perf_counter() - start})
+
+    def end_frame(self, **metrics) -> None:
+        """Ends the current frame and records it.
+
+        Args:
+            **metrics: Other metrics of the frame, serializable to JSON.
+        """
+        now = time.perf_counter()
+        start = now if self._frame_start is None else self._frame_start
+        allocated_blocks = sys.getallocatedblocks()
+        self._records.append({
+            "frame": self._frame_count,
+            "start": start - self._origin,
+            "frame_time": now - start,
+            "stages": self._stages,
+            "allocated_blocks": allocated_blocks - self._allocated_blocks,
+            **metrics,
+            })
+        self._frame_count += 1
+        self._frame_start = None
+        self._stages = []
+        self._allocated_blocks = allocated_blocks
+
+    def write_jsonl(self, path: str) -> None:
+        """Writes the frames kept as JSON Lines, one frame per line.
+
+        Args:
+            path: Where the file is written.
+        """
+        with open(path, "w", encoding="utf-8") as file:
+            for record in self._records:
+                file.write(json.dumps(record) + "\n")
+
+    def write_chrome_trace(self, path: str) -> None:
+        """Writes the frames kept in the trace event format of Chrome's trace viewer and Perfetto.
+
+        Frames and stages are complete events on a single track. The other numeric metrics are
+        counters, so that they can be lined up with the frames.
+
+        Args:
+            path: Where the file is written.
+        """
+        events = []
+        for record in self._records:
+            metrics = {key: value for key, value in record.items() if key != "stages"}
+            events.append({"name": "frame", "ph": "X", "pid": 1, "tid": 1,
+                           "ts": record["start"]*1e6, "dur": record["frame_time"]*1e6,
+                           "args": metrics})
+            for stage in record["stages"]:
+                events.append({"name": stage["name"], "ph": "X", "pid": 1, "tid": 1,
+                               "ts": stage["start"]*1e6, "dur": stage["duration"]*1e6})
+            for key, value in metrics.items():
+                if key not in ("frame", "start") and isinstance(value, (int, float)):
+                    events.append({"name": key, "ph": "C", "pid": 1,
+                                   "ts": record["start"]*1e6, "args": {key: value}})
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms"}, file)
@@ -0,0 +1,81 @@
+"""Provides the views displayed by the program.
+
+Classes:
+    Viewport
+"""
+
+from pygame import Rect, Vector2
+from pygame.surface import Surface
+
+from camera import Camera
+
+__author__ = "Jye-Ming Serres"
+
+
+class Viewport:
+    """A region of the screen showing the world through a camera.
+
+    The viewport may be drawn on a surface of lower resolution than the screen, in which case its
+    region and everything projected onto it are scaled down.
+
+    Attributes:
+        draw_order (`list[int]`): Index of the shapes from the furthest to the nearest. Managed by
+            the display.
+        draw_order_key (`tuple`): State of the camera and the world `draw_order` was sorted for.
+            Managed by the display.
+        center_depths (`numpy.ndarray`): Distance of the center of each shape to the image plane,
+            when `draw_order` was sorted. Managed by the display.
+        projection_cache (`dict`): Projected edges of each shape with the state they were projected
+            for. Managed by the display.
+        point_cloud_layer (`tuple`): Surface the point clouds are progressively drawn on, with the
+            state it was drawn for and the next pass of each point cloud. Managed by the display.
+        shape_layer (`tuple`): Surface the shapes are kept drawn on between frames within a frame
+            budget, with the state it was drawn for, the box of pixels covered by each shape and a
+            surface of the same size its regions are drawn again on. Managed by the display.
+    """
+
+    def __init__(self, camera: Camera, screen: Surface, rect: Rect, scale: float = 1) -> None:
+        """Creates an instance drawing on a region of the screen.
+
+        Args:
+            camera: The camera through which the world is seen.
+            screen: The whole screen, or the surface drawn in its place.
+            rect: Region of `screen` covered by the viewport.
+            scale: Pixels of `screen` per pixel of the actual screen.
+        """
+        self._camera = camera
+        self._rect = Rect(rect)
+        self._scale = scale
+        self._surface = screen.subsurface(self._rect)
+        self._center = Vector2(self._rect.size)/2
+        self.draw_order = []
+        self.draw_order_key = None
+        self.center_depths = None
+        self.projection_cache = {}
+        self.point_cloud_layer = None
+        self.shape_layer = None
+
+    @property
+    def camera(self) -> Camera:
+        """The camera through which the world is seen."""
+        return self._camera
+
+    @property
+    def rect(self) -> Rect:
+        """Region of the screen, or of the surface drawn in its place, covered by the viewport."""
+        return self._rect
+
+    @property
+    def scale(self) -> float:
+        """Pixels of the viewport's surface per pixel of the actual screen."""
+        return self._scale
+
+    @property
+    def surface(self) -> Surface:
+        """Subsurface of the screen covered by the viewport."""
+        return self._surface
+
+    @property
+    def center(self) -> Vector2:
+        """Center of the viewport relative to its top left corner."""
+        return self._center
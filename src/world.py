@@ -4,8 +4,15 @@ Classes:
     World
 """
 
+import sys
+
+import numpy as np
+
 from shape import Shape
+from node import Group
+from point_cloud import PointCloud
 from camera import Camera
+from kinematics import Kinematics
 
 __author__ = "Jye-Ming Serres"
 
@@ -13,7 +20,23 @@ __author__ = "Jye-Ming Serres"
 class World:
     """Contains the shapes and the camera. Acts as the model of the program.
 
+    The positions, orientations and velocities of every shape are kept in shared arrays so that 
+    all moving shapes are stepped in a single batch. Static shapes cost nothing to step. The shape 
+    at index i of `shapes` is at row i of `kinematics`.
+
+    Shapes can be grouped into a scene graph: a group moves every shape and group attached to it,
+    whose transforms are relative to the group. Groups have their own shared arrays, the group at
+    index i of `groups` is at row i of `group_kinematics`.
+
+    Attributes:
+        collisions (:obj:`Collisions`): Finds the shapes overlapping after every update and makes
+            them react, if not `None`.
+
     Methods:
+        add_shape()
+        add_group()
+        add_point_cloud()
+        memory_report()
         update()
     """
 
@@ -24,8 +47,19 @@ class World:
             camera: A virtual camera controlled by the end user.
             shapes: The shapes that make up the world.
         """
-        self._shapes = shapes
+        self._shapes = []
+        self._kinematics = Kinematics()
+        self._shape_groups = [] # row of each shape's group in the group arrays, -1 without group
+        self._groups = []
+        self._group_rows = {}
+        self._group_kinematics = Kinematics()
+        self._centers = None
+        self._centers_key = None
+        self._point_clouds = []
         self._camera = camera
+        self.collisions = None
+        for shape in shapes:
+            self.add_shape(shape)
 
     @property
     def shapes(self) -> list[Shape]:
@@ -35,12 +69,135 @@ class World:
     def camera(self) -> Camera:
         return self._camera
 
+    @property
+    def kinematics(self) -> Kinematics:
+        """Positions, orientations and velocities of every shape."""
+        return self._kinematics
+
+    @property
+    def groups(self) -> list[Group]:
+        return self._groups
+
+    @property
+    def point_clouds(self) -> list[PointCloud]:
+        return self._point_clouds
+
+    @property
+    def group_kinematics(self) -> Kinematics:
+        """Positions, orientations and velocities of every group, relative to their parent."""
+        return self._group_kinematics
+
+    @property
+    def transform_version(self) -> int:
+        """Incremented every time any shape or group is added, moves or rotates."""
+        return self._kinematics.version + self._group_kinematics.version
+
+    @property
+    def centers(self) -> np.ndarray:
+        """Position of the center of each shape in world space. Shape (n, 3). (read only)
+
+        Without groups, these are the positions of `kinematics`. Grouped shapes are transformed
+        by the world transform of their group, all at once.
+        """
+        if not self._groups:
+            return self._kinematics.positions
+        key = (self.transform_version, len(self._shapes))
+        if key != self._centers_key:
+            group_rows = np.array(self._shape_groups, dtype=np.intp)
+            transforms = [group.world_transform for group in self._groups]
+            orientations = np.stack([orientation for orientation, _ in transforms])
+            positions = np.stack([position for _, position in transforms])
+            centers = self._kinematics.positions.copy()
+            grouped = np.flatnonzero(group_rows >= 0)
+            rows = group_rows[grouped]
+            centers[grouped] = (np.einsum("kij,kj->ki", orientations[rows], centers[grouped])
+                                + positions[rows])
+            self._centers = centers
+            self._centers_key = key
+        return self._centers
+
+    @property
+    def active_shapes(self) -> list[Shape]:
+        """The shapes with a non-zero rectilinear or angular velocity."""
+        return [self._shapes[row] for row in self._kinematics.moving_rows]
+
+    def add_shape(self, shape: Shape, group: Group = None) -> None:
+        """Adds a shape to the world. From now on, it is stepped with the other shapes.
+
+        Args:
+            shape: The shape to add.
+            group: The group the shape belongs to, already in the world. The shape's transform is
+                relative to the group.
+        """
+        self._check_group(group)
+        shape.attach(self._kinematics, group)
+        self._shapes.append(shape)
+        self._shape_groups.append(-1 if group is None else self._group_rows[group])
+
+    def add_group(self, group: Group, parent: Group = None) -> None:
+        """Adds a group to the world. From now on, it is stepped with the other groups.
+
+        Args:
+            group: The group to add.
+            parent: The group it belongs to, already in the world. The group's transform is
+                relative to its parent.
+        """
+        self._check_group(parent)
+        group.attach(self._group_kinematics, parent)
+        self._group_rows[group] = len(self._groups)
+        self._groups.append(group)
+
+    def add_point_cloud(self, point_cloud: PointCloud) -> None:
+        """Adds a point cloud to the world. Point clouds do not move.
+
+        Args:
+            point_cloud: The point cloud to add.
+        """
+        self._point_clouds.append(point_cloud)
+
+    def _check_group(self, group: Group | None) -> None:
+        """Makes sure a group can receive children.
+
+        Args:
+            group: The group, or `None` for the world itself.
+
+        Raises:
+            ValueError: If the group was not added to the world.
+        """
+        if group is not None and group not in self._group_rows:
+            raise ValueError("The group must be added to the world before its children")
+
+    def memory_report(self) -> dict[str, int]:
+        """Measures the memory used by the shapes of the world.
+
+        Returns:
+            Bytes used by the shape objects (with their world vertex caches), the list holding 
+            them, the kinematics rows, the groups and the distinct meshes, along with the total, 
+            the number of shapes and the bytes per shape.
+        """
+        meshes = {id(shape.mesh): shape.mesh for shape in self._shapes}
+        report = {
+            "shapes": sum(shape.nbytes for shape in self._shapes),
+            "shape_list": sys.getsizeof(self._shapes),
+            "kinematics": self._kinematics.nbytes,
+            "groups": sum(group.nbytes for group in self._groups) + self._group_kinematics.nbytes,
+            "meshes": sum(mesh.nbytes for mesh in meshes.values()),
+            }
+        report["total"] = sum(report.values())
+        report["shape_count"] = len(self._shapes)
+        report["bytes_per_shape"] = report["total"]//max(len(self._shapes), 1)
+        return report
+
     def update(self, dt: float) -> None:
-        """Steps the camera and every shape across a time interval.
+        """Steps the camera and every moving shape and group across a time interval, then makes
+        the shapes that overlap react.
 
         Args:
             dt: Delta time (seconds).
         """
-        for shape in self._shapes:
-            shape.update(dt)
+        self._kinematics.step(dt)
+        self._group_kinematics.step(dt)
+        if self.collisions is not None:
+            self.collisions.update(self._shapes, self.centers, self._kinematics)
         self._camera.update(dt)
+